@@ -0,0 +1,249 @@
+import os
+import time
+import hashlib
+import functools
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from typing import Dict, Tuple, Sequence
+from motor_logico import (SUBESTACIONES, HORAS_ANIO, CONFIABILIDAD_MINIMA, ClimaContador, generar_ciudad,
+                          programar_tormentas, traza_con_tormentas, evaluar_catalogo)
+
+# ============================================================
+# BARRIDO DE PARÁMETROS (edificios × prob_tormenta × subestación × semilla)
+# ============================================================
+EJES_BARRIDO = ("edificios", "prob_tormenta", "subestacion", "semilla")
+METRICAS_BARRIDO = ("blackouts", "costo_ajustado", "confiabilidad_real")
+GUARDAR_CADA_S = 10.0  # Segundos entre checkpoints
+VERSION_BARRIDO = 1
+
+def huella_catalogo(catalogo: Dict[str, Dict]) -> str:
+    """Hash del contenido del catálogo (capacidades y costos): los nombres solos no bastan para continuar"""
+    contenido = sorted((tipo, sorted(datos.items())) for tipo, datos in catalogo.items())
+    return hashlib.sha256(repr(contenido).encode()).hexdigest()
+
+class ResultadoBarrido:
+    """
+    Tensores densos (edificios, prob_tormenta, subestación, semilla) de cada métrica.
+    `hecho[i, k]` marca las tareas (tamaño i, semilla k) ya calculadas.
+    """
+    def __init__(self, edificios: Sequence[int], probs: Sequence[float], subestaciones: Sequence[str],
+                 semillas: Sequence[int], dia_inicio: int = 0, hora_inicio: int = 0, semilla_ciudad: int = 0,
+                 huella: str = ""):
+        self.edificios = np.asarray(edificios, dtype=np.int64)
+        self.probs = np.asarray(probs, dtype=np.float64)
+        self.subestaciones = np.asarray(subestaciones, dtype=str)
+        self.semillas = np.asarray(semillas, dtype=np.int64)
+        self.dia_inicio = dia_inicio
+        self.hora_inicio = hora_inicio
+        self.semilla_ciudad = semilla_ciudad
+        self.huella = huella  # huella_catalogo del catálogo barrido
+        forma = (len(self.edificios), len(self.probs), len(self.subestaciones), len(self.semillas))
+        self.blackouts = np.zeros(forma, dtype=np.int32)
+        self.costo_ajustado = np.full(forma, np.nan)
+        self.confiabilidad_real = np.full(forma, np.nan)
+        self.hecho = np.zeros((forma[0], forma[3]), dtype=bool)
+
+    @property
+    def forma(self) -> Tuple[int, ...]:
+        return self.blackouts.shape
+
+    @property
+    def completo(self) -> bool:
+        return bool(self.hecho.all())
+
+    def registrar(self, i: int, k: int, valores: np.ndarray):
+        """Valores (prob, subestación, métrica) de la tarea (tamaño i, semilla k)"""
+        self.blackouts[i, :, :, k] = valores[..., 0]
+        self.costo_ajustado[i, :, :, k] = valores[..., 1]
+        self.confiabilidad_real[i, :, :, k] = valores[..., 2]
+        self.hecho[i, k] = True
+
+    def ganadoras(self) -> np.ndarray:
+        """
+        Índice de la subestación elegida en cada punto (mismo criterio que elegir_ganadora)
+        -> (edificios, prob_tormenta, semilla). Las tareas sin calcular quedan en -1.
+        """
+        viable = self.confiabilidad_real > CONFIABILIDAD_MINIMA
+        costo = np.where(viable, self.costo_ajustado, np.inf)
+        confiabilidad = np.nan_to_num(self.confiabilidad_real, nan=-np.inf)
+        ganadoras = np.where(viable.any(axis=2), costo.argmin(axis=2), confiabilidad.argmax(axis=2))
+        return np.where(self.hecho[:, None, :], ganadoras, -1)
+
+    def frecuencia_ganadora(self) -> np.ndarray:
+        """
+        Fracción de las semillas calculadas en que gana cada subestación
+        -> (edificios, prob_tormenta, subestación). NaN en los tamaños sin ninguna semilla hecha.
+        """
+        ganadoras = self.ganadoras()
+        veces = np.stack([(ganadoras == j).sum(axis=2) for j in range(len(self.subestaciones))], axis=2)
+        hechas = self.hecho.sum(axis=1)[:, None, None]
+        return np.divide(veces, hechas, out=np.full(veces.shape, np.nan), where=hechas > 0)
+
+    # ------------------------------------------------------------
+    # Persistencia (.npz)
+    # ------------------------------------------------------------
+    def _ejes(self) -> Dict[str, np.ndarray]:
+        return {"edificios": self.edificios, "probs": self.probs, "subestaciones": self.subestaciones,
+                "semillas": self.semillas,
+                "escenario": np.array([self.dia_inicio, self.hora_inicio, self.semilla_ciudad, VERSION_BARRIDO]),
+                "huella": np.array(self.huella)}
+
+    def compatible(self, otro: "ResultadoBarrido") -> bool:
+        """Mismos ejes, escenario y contenido del catálogo (se puede continuar uno con el otro)"""
+        return all(np.array_equal(a, b) for a, b in zip(self._ejes().values(), otro._ejes().values()))
+
+    def guardar(self, ruta: str):
+        # Escritura atómica: un corte a mitad de camino deja el checkpoint anterior intacto
+        temporal = ruta + ".tmp.npz"
+        np.savez(temporal, blackouts=self.blackouts, costo_ajustado=self.costo_ajustado,
+                 confiabilidad_real=self.confiabilidad_real, hecho=self.hecho, **self._ejes())
+        os.replace(temporal, ruta)
+
+    @classmethod
+    def cargar(cls, ruta: str) -> "ResultadoBarrido":
+        with np.load(ruta) as datos:
+            dia, hora, semilla_ciudad, _ = datos["escenario"].tolist()
+            # Sin huella (archivo anterior) no es compatible con ningún catálogo: se empieza de cero
+            huella = str(datos["huella"]) if "huella" in datos else ""
+            resultado = cls(datos["edificios"], datos["probs"], datos["subestaciones"].tolist(),
+                            datos["semillas"], dia, hora, semilla_ciudad, huella)
+            if datos["escenario"][3] != VERSION_BARRIDO:
+                return resultado  # Otra versión del modelo: se empieza de cero
+            for campo in METRICAS_BARRIDO + ("hecho",):
+                getattr(resultado, campo)[...] = datos[campo]
+        return resultado
+
+# ============================================================
+# TAREAS (una por tamaño de ciudad y semilla)
+# ============================================================
+@functools.lru_cache(maxsize=16)
+def _demanda_base_hora(n_edificios: int, semilla_ciudad: int) -> np.ndarray:
+    """La ciudad solo entra en la demanda a través de sus 24 valores horarios (se cachea por worker)"""
+    return generar_ciudad(n_edificios, semilla=semilla_ciudad, como_arrays=True).demanda_base_hora
+
+def _evaluar_tarea(n_edificios: int, semilla_ciudad: int, semilla: int, probs: np.ndarray,
+                   catalogo: Dict[str, Dict], tiempo_inicio: int) -> np.ndarray:
+    """
+    Worker: todas las probabilidades y subestaciones de una ciudad y semilla -> (prob, subestación, métrica).
+    El clima se sortea una vez (los sorteos no dependen de la probabilidad) y para cada
+    probabilidad solo se rehace el calendario de tormentas. Es la misma traza que simular_anio
+    con motor vectorizado y esa semilla.
+    """
+    demanda_base = _demanda_base_hora(n_edificios, semilla_ciudad)
+    temperatura, sorteo, duraciones, multiplicador = ClimaContador(semilla).clima(np.arange(tiempo_inicio, HORAS_ANIO))
+    historial = {tipo: 0 for tipo in catalogo}
+    valores = np.empty((len(probs), len(catalogo), len(METRICAS_BARRIDO)))
+    for p, prob in enumerate(probs.tolist()):
+        en_tormenta = programar_tormentas(sorteo, prob, duraciones)
+        traza = traza_con_tormentas(demanda_base, tiempo_inicio, temperatura, multiplicador, en_tormenta)
+        for j, metricas in enumerate(evaluar_catalogo(traza, catalogo, historial)):
+            valores[p, j] = [metricas["blackouts_futuros"], metricas["costo_ajustado"], metricas["confiabilidad_real"]]
+    return valores
+
+def barrer(edificios: Sequence[int], probs: Sequence[float], semillas,
+           catalogo: Dict[str, Dict] = None, dia_inicio: int = 0, hora_inicio: int = 0,
+           semilla_ciudad: int = 0, ruta: str = None, max_workers: int = None,
+           guardar_cada: float = GUARDAR_CADA_S) -> ResultadoBarrido:
+    """
+    Barre edificios × prob_tormenta × subestación × semilla. Cada semilla cambia el clima;
+    la ciudad de cada tamaño sale de `semilla_ciudad`. Con `ruta` guarda checkpoints (.npz)
+    y, si ya existe uno compatible, continúa solo con las tareas que faltan.
+    """
+    if catalogo is None:
+        catalogo = SUBESTACIONES
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    if isinstance(semillas, int):
+        semillas = range(semillas)
+
+    resultado = ResultadoBarrido(edificios, probs, list(catalogo), list(semillas),
+                                 dia_inicio, hora_inicio, semilla_ciudad, huella_catalogo(catalogo))
+    if ruta and os.path.exists(ruta):
+        previo = ResultadoBarrido.cargar(ruta)
+        if previo.compatible(resultado):
+            resultado = previo
+            print(f"↩️  Continuando barrido: {int(resultado.hecho.sum())} de {resultado.hecho.size} tareas hechas")
+
+    tiempo_inicio = min(dia_inicio * 24 + hora_inicio, HORAS_ANIO)
+    # Tamaño por fuera: tareas seguidas reutilizan la ciudad cacheada en el worker
+    pendientes = [(i, k) for i in range(len(resultado.edificios)) for k in range(len(resultado.semillas))
+                  if not resultado.hecho[i, k]]
+    total = len(pendientes)
+    print(f"🧮 Barrido {' × '.join(map(str, resultado.forma))} ({np.prod(resultado.forma):,} puntos, "
+          f"{total} tareas pendientes, {max_workers} procesos)")
+
+    def argumentos(i: int, k: int) -> Tuple:
+        return (int(resultado.edificios[i]), semilla_ciudad, int(resultado.semillas[k]),
+                resultado.probs, catalogo, tiempo_inicio)
+
+    ultimo_guardado = time.perf_counter()
+    hechas = 0
+
+    def al_terminar(i: int, k: int, valores: np.ndarray):
+        nonlocal ultimo_guardado, hechas
+        resultado.registrar(i, k, valores)
+        hechas += 1
+        if ruta and time.perf_counter() - ultimo_guardado >= guardar_cada:
+            resultado.guardar(ruta)
+            ultimo_guardado = time.perf_counter()
+            print(f"💾 Checkpoint: {hechas}/{total} tareas")
+
+    try:
+        if max_workers <= 1:
+            for i, k in pendientes:
+                al_terminar(i, k, _evaluar_tarea(*argumentos(i, k)))
+        else:
+            # Cola compartida: cada worker toma la próxima tarea apenas termina la suya,
+            # con pocas tareas en vuelo para poder cortar rápido
+            with ProcessPoolExecutor(max_workers=max_workers) as pool:
+                cola = iter(pendientes)
+                en_vuelo = {}
+                for i, k in cola:
+                    en_vuelo[pool.submit(_evaluar_tarea, *argumentos(i, k))] = (i, k)
+                    if len(en_vuelo) >= max_workers * 4:
+                        break
+                while en_vuelo:
+                    listos, _ = wait(en_vuelo, return_when=FIRST_COMPLETED)
+                    for futuro in listos:
+                        al_terminar(*en_vuelo.pop(futuro), futuro.result())
+                        siguiente = next(cola, None)
+                        if siguiente is not None:
+                            en_vuelo[pool.submit(_evaluar_tarea, *argumentos(*siguiente))] = siguiente
+    finally:
+        # También ante Ctrl+C: lo calculado queda en disco para continuar
+        if ruta:
+            resultado.guardar(ruta)
+    return resultado
+
+# ============================================================
+# TEST RÁPIDO
+# ============================================================
+if __name__ == "__main__":
+    import tempfile
+
+    ruta = os.path.join(tempfile.gettempdir(), "barrido_demo.npz")
+    if os.path.exists(ruta):
+        os.remove(ruta)
+    edificios = [50, 100, 200, 400, 800, 1600, 3200, 6400, 12800, 25600]
+    probs = np.linspace(0.0, 0.1, 21)
+    semillas = 50
+
+    t0 = time.perf_counter()
+    resultado = barrer(edificios, probs, semillas, ruta=ruta)
+    print(f"{np.prod(resultado.forma):,} puntos en {time.perf_counter() - t0:.1f} s (completo: {resultado.completo})")
+
+    # Continuar un barrido cortado: se recalcula solo lo que falta
+    parcial = ResultadoBarrido.cargar(ruta)
+    parcial.hecho[len(edificios) // 2:] = False
+    parcial.guardar(ruta)
+    t0 = time.perf_counter()
+    reanudado = barrer(edificios, probs, semillas, ruta=ruta)
+    print(f"Reanudado en {time.perf_counter() - t0:.1f} s, "
+          f"idéntico: {np.array_equal(reanudado.costo_ajustado, resultado.costo_ajustado)}")
+
+    frecuencia = resultado.frecuencia_ganadora()
+    for i in (0, len(edificios) // 2, len(edificios) - 1):
+        for p in (0, len(probs) // 2, len(probs) - 1):
+            j = int(frecuencia[i, p].argmax())
+            print(f"{edificios[i]:>6} edificios, tormenta {probs[p]:.3f}: "
+                  f"{resultado.subestaciones[j]} ({frecuencia[i, p, j]:.0%} de las semillas)")
@@ -0,0 +1,183 @@
+import os
+import copy
+import pickle
+import hashlib
+from collections import OrderedDict
+from typing import List, Dict, Tuple
+from motor_logico import (SUBESTACIONES, Edificio, ProyeccionIncremental, arrays_ciudad,
+                          encontrar_mejor_subestacion)
+
+# ============================================================
+# CACHÉ DE RESULTADOS DEL OPTIMIZADOR
+# ============================================================
+PASO_PROB_TORMENTA = 1e-4  # Probabilidades más cercanas que esto comparten resultado
+VERSION_CACHE = 2          # Subir si cambia el modelo (invalida lo guardado en disco)
+
+def huella_ciudad(edificios: List[Edificio]) -> str:
+    """Hash del contenido de la ciudad (tipo y población de cada edificio, en orden)"""
+    ciudad = arrays_ciudad(edificios)
+    h = hashlib.sha256()
+    h.update(ciudad.codigo_tipo.tobytes())
+    h.update(ciudad.poblacion.tobytes())
+    return h.hexdigest()
+
+def cuantizar_prob(prob_tormenta: float) -> float:
+    """Redondea la probabilidad de tormenta al paso de la caché"""
+    return round(round(prob_tormenta / PASO_PROB_TORMENTA) * PASO_PROB_TORMENTA, 10)
+
+def clave_escenario(edificios: List[Edificio], dia_actual: int, hora_actual: int,
+                    historial_fallos: Dict[str, int], prob_tormenta: float, motor: str,
+                    semilla: int, catalogo: Dict[str, Dict]) -> Tuple:
+    """Clave de la caché: ciudad + escenario (todo lo que cambia el resultado)"""
+    return (VERSION_CACHE,
+            huella_ciudad(edificios),
+            int(dia_actual), int(hora_actual),
+            cuantizar_prob(prob_tormenta),
+            semilla, motor,
+            tuple(sorted(historial_fallos.items())),
+            repr(sorted(catalogo.items())))
+
+class CacheOptimizador:
+    """
+    LRU acotada delante de encontrar_mejor_subestacion.
+    Con `ruta` se persiste en disco (pickle) y se recarga al crearla.
+    """
+    def __init__(self, max_entradas: int = 128, ruta: str = None):
+        self.max_entradas = max_entradas
+        self.ruta = ruta
+        self.entradas = OrderedDict()
+        self.aciertos = 0
+        self.fallos = 0
+        if ruta and os.path.exists(ruta):
+            self._cargar()
+
+    def __len__(self) -> int:
+        return len(self.entradas)
+
+    def obtener(self, clave: Tuple):
+        """Resultado guardado (o None), marcándolo como usado recientemente"""
+        if clave not in self.entradas:
+            self.fallos += 1
+            return None
+        self.aciertos += 1
+        self.entradas.move_to_end(clave)
+        return copy.deepcopy(self.entradas[clave])
+
+    def guardar(self, clave: Tuple, valor):
+        self.entradas[clave] = copy.deepcopy(valor)
+        self.entradas.move_to_end(clave)
+        while len(self.entradas) > self.max_entradas:
+            self.entradas.popitem(last=False)  # Descartar la menos usada
+        if self.ruta:
+            self._persistir()
+
+    def limpiar(self):
+        self.entradas.clear()
+        self.aciertos = 0
+        self.fallos = 0
+        if self.ruta and os.path.exists(self.ruta):
+            os.remove(self.ruta)
+
+    def clave_proyeccion(self, proyeccion: ProyeccionIncremental, dia_actual: int, hora_actual: int,
+                         historial_fallos: Dict[str, int], prob_tormenta: float,
+                         catalogo: Dict[str, Dict] = None) -> Tuple:
+        """Clave del resultado de una proyección incremental (para resultados calculados aparte)"""
+        return self.clave_incremental(proyeccion.ciudad, proyeccion.semilla, dia_actual, hora_actual,
+                                      historial_fallos, prob_tormenta, catalogo)
+
+    def clave_incremental(self, edificios: List[Edificio], semilla: int, dia_actual: int, hora_actual: int,
+                          historial_fallos: Dict[str, int], prob_tormenta: float,
+                          catalogo: Dict[str, Dict] = None) -> Tuple:
+        """La misma clave sin tener la proyección construida (solo dependen de la ciudad y la semilla)"""
+        return clave_escenario(edificios, dia_actual, hora_actual, historial_fallos,
+                               prob_tormenta, "incremental", semilla,
+                               SUBESTACIONES if catalogo is None else catalogo)
+
+    def encontrar_mejor_subestacion(self, edificios: List[Edificio],
+                                    dia_actual: int = 0,
+                                    hora_actual: int = 0,
+                                    historial_fallos: Dict[str, int] = None,
+                                    prob_tormenta: float = 0.0,
+                                    motor: str = "vectorizado",
+                                    semilla: int = None,
+                                    catalogo: Dict[str, Dict] = None,
+                                    proyeccion: ProyeccionIncremental = None) -> Tuple[str, List[Dict]]:
+        """
+        Igual que motor_logico.encontrar_mejor_subestacion, pero memoizada.
+        Sin semilla el resultado no es reproducible, así que no se guarda.
+        """
+        if proyeccion is not None:
+            # El año sembrado de la proyección define la semilla y el "motor"
+            edificios, motor, semilla = proyeccion.ciudad, "incremental", proyeccion.semilla
+        if catalogo is None:
+            catalogo = SUBESTACIONES
+        if historial_fallos is None:
+            historial_fallos = {tipo: 0 for tipo in catalogo}
+        # Se simula con la probabilidad cuantizada para que el resultado coincida con la clave
+        prob_tormenta = cuantizar_prob(prob_tormenta)
+
+        if semilla is None:
+            return encontrar_mejor_subestacion(edificios, dia_actual, hora_actual, historial_fallos,
+                                               prob_tormenta, motor, semilla, catalogo, proyeccion)
+
+        clave = clave_escenario(edificios, dia_actual, hora_actual, historial_fallos,
+                                prob_tormenta, motor, semilla, catalogo)
+        resultado = self.obtener(clave)
+        if resultado is not None:
+            print(f"⚡ Resultado en caché (Día {dia_actual}, {hora_actual:02d}:00): {resultado[0]}")
+            return resultado
+
+        resultado = encontrar_mejor_subestacion(edificios, dia_actual, hora_actual, historial_fallos,
+                                                prob_tormenta, motor, semilla, catalogo, proyeccion)
+        self.guardar(clave, resultado)
+        return resultado
+
+    # ------------------------------------------------------------
+    # Persistencia
+    # ------------------------------------------------------------
+    def _cargar(self):
+        try:
+            with open(self.ruta, "rb") as f:
+                entradas = pickle.load(f)
+        except Exception:
+            # Archivo corrupto o de otra versión: se empieza vacía
+            return
+        for clave, valor in list(entradas.items())[-self.max_entradas:]:
+            if clave[0] == VERSION_CACHE:
+                self.entradas[clave] = valor
+
+    def _persistir(self):
+        # Escritura atómica: nunca queda un archivo a medias
+        temporal = self.ruta + ".tmp"
+        with open(temporal, "wb") as f:
+            pickle.dump(self.entradas, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporal, self.ruta)
+
+# ============================================================
+# TEST RÁPIDO
+# ============================================================
+if __name__ == "__main__":
+    import time
+    import tempfile
+    from motor_logico import generar_ciudad
+
+    eds = generar_ciudad(200, semilla=7)
+    ruta = os.path.join(tempfile.gettempdir(), "cache_optimizador_demo.pkl")
+    cache = CacheOptimizador(ruta=ruta)
+    cache.limpiar()
+
+    for intento in range(3):
+        t0 = time.perf_counter()
+        mejor, _ = cache.encontrar_mejor_subestacion(eds, 10, 12, prob_tormenta=0.01, semilla=1)
+        print(f"Intento {intento + 1}: {mejor} en {(time.perf_counter() - t0) * 1000:.2f} ms")
+
+    # Una ciudad distinta no reutiliza el resultado
+    otra = generar_ciudad(200, semilla=8)
+    cache.encontrar_mejor_subestacion(otra, 10, 12, prob_tormenta=0.01, semilla=1)
+
+    # Una caché nueva sobre el mismo archivo arranca con los resultados guardados
+    recargada = CacheOptimizador(ruta=ruta)
+    recargada.encontrar_mejor_subestacion(eds, 10, 12, prob_tormenta=0.01, semilla=1)
+    print(f"Entradas: {len(recargada)} | aciertos {cache.aciertos + recargada.aciertos}, "
+          f"fallos {cache.fallos + recargada.fallos}")
+    cache.limpiar()
@@ -0,0 +1,174 @@
+import os
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List, Dict, Tuple, Iterator
+from motor_logico import (SUBESTACIONES, Edificio, arrays_ciudad, simular_traza,
+                          evaluar_catalogo, elegir_ganadora)
+from memoria_compartida import CiudadCompartida
+
+# ============================================================
+# ENSAMBLE MONTE CARLO DE LA PROYECCIÓN ANUAL
+# ============================================================
+# Métricas que se resumen por subestación
+METRICAS_ENSAMBLE = ("blackouts", "confiabilidad", "confiabilidad_real", "costo_ajustado")
+PERCENTILES = (5, 50, 95)
+Z_95 = 1.959964  # Cuantil normal para el intervalo de confianza del 95%
+
+def semillas_replicas(semilla: int, n_replicas: int) -> List[int]:
+    """Semilla independiente y reproducible para cada réplica (no depende de los workers)"""
+    hijas = np.random.SeedSequence(semilla).spawn(n_replicas)
+    return [int(hija.generate_state(1)[0]) for hija in hijas]
+
+def _correr_lote(ciudad, dia_actual: int, hora_actual: int, prob_tormenta: float,
+                 catalogo: Dict[str, Dict], historial_fallos: Dict[str, int],
+                 motor: str, semillas: List[int]) -> np.ndarray:
+    """Worker: corre un lote de réplicas -> array (réplicas, subestaciones, métricas)"""
+    valores = np.empty((len(semillas), len(catalogo), len(METRICAS_ENSAMBLE)))
+    for i, semilla in enumerate(semillas):
+        traza = simular_traza(ciudad, dia_actual, hora_actual, prob_tormenta, motor, semilla)
+        for j, metricas in enumerate(evaluar_catalogo(traza, catalogo, historial_fallos)):
+            valores[i, j] = [metricas[m] for m in METRICAS_ENSAMBLE]
+    return valores
+
+def resumir_muestras(muestras: np.ndarray) -> Dict:
+    """Media, desviación, percentiles e intervalo de confianza (95%) de la media"""
+    n = len(muestras)
+    media = float(muestras.mean())
+    desviacion = float(muestras.std(ddof=1)) if n > 1 else 0.0
+    margen = Z_95 * desviacion / np.sqrt(n)
+    resumen = {"media": media, "desviacion": desviacion,
+               "ic95": (media - margen, media + margen)}
+    for p, valor in zip(PERCENTILES, np.percentile(muestras, PERCENTILES).tolist()):
+        resumen[f"p{p}"] = valor
+    return resumen
+
+def resumir_ensamble(valores: np.ndarray, catalogo: Dict[str, Dict]) -> Tuple[str, List[Dict]]:
+    """Recomendada y estadísticas por subestación de un array (réplicas, subestaciones, métricas)"""
+    n_replicas = len(valores)
+
+    # Frecuencia con la que cada subestación gana réplica a réplica
+    tipos = list(catalogo)
+    idx_conf = METRICAS_ENSAMBLE.index("confiabilidad_real")
+    idx_costo = METRICAS_ENSAMBLE.index("costo_ajustado")
+    victorias = dict.fromkeys(tipos, 0)
+    for replica in valores:
+        candidatos = [{"tipo": tipo, "confiabilidad_real": v[idx_conf], "costo_ajustado": v[idx_costo]}
+                      for tipo, v in zip(tipos, replica)]
+        victorias[elegir_ganadora(candidatos)["tipo"]] += 1
+
+    resultados = []
+    for j, (tipo, datos) in enumerate(catalogo.items()):
+        r = {"tipo": tipo,
+             "capacidad_mw": datos.get("capacidad_mw", datos["capacidad_kw"] / 1000),
+             "replicas": n_replicas,
+             "frecuencia_ganadora": victorias[tipo] / n_replicas}
+        for k, metrica in enumerate(METRICAS_ENSAMBLE):
+            r[metrica] = resumir_muestras(valores[:, j, k])
+        resultados.append(r)
+
+    # Recomendación con el mismo criterio del optimizador, aplicado a las medias
+    ganadora = elegir_ganadora([{"tipo": r["tipo"],
+                                 "confiabilidad_real": r["confiabilidad_real"]["media"],
+                                 "costo_ajustado": r["costo_ajustado"]["media"]} for r in resultados])
+    return ganadora["tipo"], resultados
+
+def iterar_ensamble(edificios: List[Edificio],
+                    n_replicas: int = 100,
+                    dia_actual: int = 0,
+                    hora_actual: int = 0,
+                    historial_fallos: Dict[str, int] = None,
+                    prob_tormenta: float = 0.0,
+                    semilla: int = None,
+                    catalogo: Dict[str, Dict] = None,
+                    motor: str = "vectorizado",
+                    max_workers: int = None) -> Iterator[Tuple[str, List[Dict]]]:
+    """
+    Igual que simular_ensamble, pero produce el resumen acumulado cada vez que termina
+    un lote de réplicas. El último resumen es el resultado final (no depende del orden).
+    Con varios procesos la ciudad se publica una vez en memoria compartida.
+    """
+    if catalogo is None:
+        catalogo = SUBESTACIONES
+    if historial_fallos is None:
+        historial_fallos = {tipo: 0 for tipo in catalogo}
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+
+    ciudad = arrays_ciudad(edificios)
+    semillas = semillas_replicas(semilla, n_replicas)
+    args = (ciudad, dia_actual, hora_actual, prob_tormenta, catalogo, historial_fallos, motor)
+
+    # Varios lotes por worker para repartir la carga sin pagar overhead por réplica
+    n_lotes = min(n_replicas, max(max_workers, 1) * 4)
+    lotes = [lote.tolist() for lote in np.array_split(semillas, n_lotes)]
+    terminados = []
+
+    if max_workers <= 1:
+        for lote in lotes:
+            terminados.append(_correr_lote(*args, lote))
+            yield resumir_ensamble(np.concatenate(terminados), catalogo)
+        return
+
+    # Los lotes reciben una referencia al bloque compartido, no las columnas de la ciudad
+    propia = not isinstance(edificios, CiudadCompartida)
+    compartida = CiudadCompartida(ciudad) if propia else edificios
+    args = (compartida,) + args[1:]
+    try:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            futuros = [pool.submit(_correr_lote, *args, lote) for lote in lotes]
+            for futuro in as_completed(futuros):
+                terminados.append(futuro.result())
+                yield resumir_ensamble(np.concatenate(terminados), catalogo)
+    finally:
+        if propia:
+            compartida.cerrar()
+
+def simular_ensamble(edificios: List[Edificio],
+                     n_replicas: int = 100,
+                     dia_actual: int = 0,
+                     hora_actual: int = 0,
+                     historial_fallos: Dict[str, int] = None,
+                     prob_tormenta: float = 0.0,
+                     semilla: int = None,
+                     catalogo: Dict[str, Dict] = None,
+                     motor: str = "vectorizado",
+                     max_workers: int = None) -> Tuple[str, List[Dict]]:
+    """
+    Corre N réplicas independientes de la proyección y resume por subestación.
+    Devuelve la recomendada (según las medias) y un dict de estadísticas por subestación.
+    """
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+
+    print(f"🎲 Ensamble de {n_replicas} réplicas en {max_workers} procesos...")
+
+    for ganadora, resultados in iterar_ensamble(edificios, n_replicas, dia_actual, hora_actual,
+                                                historial_fallos, prob_tormenta, semilla, catalogo,
+                                                motor, max_workers):
+        pass
+
+    print(f" ÓPTIMA (ENSAMBLE): {ganadora}")
+    return ganadora, resultados
+
+# ============================================================
+# TEST RÁPIDO
+# ============================================================
+if __name__ == "__main__":
+    from motor_logico import generar_ciudad
+
+    eds = generar_ciudad(200)
+    for workers in (1, os.cpu_count() or 1):
+        t0 = time.perf_counter()
+        mejor, todos = simular_ensamble(eds, n_replicas=200, prob_tormenta=0.01,
+                                        semilla=42, max_workers=workers)
+        print(f"{workers} proceso(s): {time.perf_counter() - t0:.2f} s")
+
+    # Resultados progresivos: el resumen se refina a medida que terminan los lotes
+    for ganadora, parcial in iterar_ensamble(eds, n_replicas=200, prob_tormenta=0.01, semilla=42):
+        print(f"{parcial[0]['replicas']:4d} réplicas -> {ganadora}")
+
+    for r in todos:
+        c = r["costo_ajustado"]
+        print(f"{r['tipo']}: costo ${c['media']:,.0f} (IC95 ${c['ic95'][0]:,.0f} - ${c['ic95'][1]:,.0f}) "
+              f"| blackouts p95 {r['blackouts']['p95']:.0f}h | gana {r['frecuencia_ganadora']:.0%}")
@@ -0,0 +1,173 @@
+import os
+import numpy as np
+from typing import List, Dict
+from motor_logico import (SUBESTACIONES, TIPOS_EDIFICIO, Edificio, ResultadoAnual, arrays_ciudad)
+try:
+    import pandas as pd
+    PANDAS_AVAILABLE = True
+except ImportError:
+    PANDAS_AVAILABLE = False
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+    ARROW_AVAILABLE = True
+except ImportError:
+    ARROW_AVAILABLE = False
+
+# ============================================================
+# RESULTADOS COMO DATAFRAMES (columnas NumPy sin copiar)
+# ============================================================
+def _requiere_pandas():
+    if not PANDAS_AVAILABLE:
+        raise ImportError("Exportar a DataFrame requiere pandas (pip install pandas)")
+
+def _categoria(codigos: np.ndarray, categorias) -> "pd.Categorical":
+    """Columna categórica a partir de códigos enteros ya calculados (no se comparan strings)"""
+    return pd.Categorical.from_codes(codigos, categories=list(categorias))
+
+def _subestacion_constante(tipo: str, n: int, catalogo: Dict[str, Dict]) -> "pd.Categorical":
+    """
+    Una subestación repetida n veces con las categorías del catálogo. El entero de los códigos
+    se ajusta al tamaño del catálogo (int8 hasta 127 subestaciones, más ancho si hay cientos).
+    """
+    categorias = list(catalogo) if tipo in catalogo else list(catalogo) + [tipo]
+    dtype = np.promote_types(np.int8, np.min_scalar_type(-len(categorias)))
+    return _categoria(np.full(n, categorias.index(tipo), dtype=dtype), categorias)
+
+def horas_a_dataframe(resultado: ResultadoAnual, catalogo: Dict[str, Dict] = None) -> "pd.DataFrame":
+    """
+    Demanda hora a hora de un ResultadoAnual. La columna `demanda` es una vista del buffer
+    del resultado (no se copia) y el índice `tiempo` es un RangeIndex (no ocupa memoria).
+    """
+    _requiere_pandas()
+    catalogo = SUBESTACIONES if catalogo is None else catalogo
+    n = len(resultado.historial_horas)
+    indice = pd.RangeIndex(resultado.tiempo_inicio, resultado.tiempo_inicio + n, name="tiempo")
+    return pd.DataFrame({"demanda": resultado.historial_horas,
+                         "subestacion": _subestacion_constante(resultado.tipo, n, catalogo)},
+                        index=indice, copy=False)
+
+def muestras_a_dataframe(resultado: ResultadoAnual, catalogo: Dict[str, Dict] = None) -> "pd.DataFrame":
+    """Historial muestreado cada 6 horas (dia, hora, demanda, temperatura) con su subestación"""
+    _requiere_pandas()
+    catalogo = SUBESTACIONES if catalogo is None else catalogo
+    historial = resultado.historial_demanda
+    columnas = {campo: historial[campo] for campo in historial.dtype.names}
+    columnas["subestacion"] = _subestacion_constante(resultado.tipo, len(historial), catalogo)
+    return pd.DataFrame(columnas, copy=False)
+
+def metricas_a_dataframe(resultados: List[Dict], ganadora: str = None,
+                         catalogo: Dict[str, Dict] = None) -> "pd.DataFrame":
+    """Métricas del optimizador (una fila por subestación), con `tipo` categórico y la ganadora marcada"""
+    _requiere_pandas()
+    catalogo = SUBESTACIONES if catalogo is None else catalogo
+    df = pd.DataFrame(resultados)
+    if "tipo" in df:
+        categorias = list(catalogo) + [t for t in df["tipo"].unique() if t not in catalogo]
+        df["tipo"] = pd.Categorical(df["tipo"], categories=categorias)
+        if ganadora is not None:
+            df["ganadora"] = df["tipo"] == ganadora
+    return df
+
+def ciudad_a_dataframe(edificios: List[Edificio]) -> "pd.DataFrame":
+    """Columnas de la ciudad (una fila por edificio) con `tipo` categórico sobre los códigos int8"""
+    _requiere_pandas()
+    ciudad = arrays_ciudad(edificios)
+    fila, columna = ciudad.coordenadas_grid()
+    return pd.DataFrame({"tipo": _categoria(ciudad.codigo_tipo, TIPOS_EDIFICIO),
+                         "poblacion": ciudad.poblacion,
+                         "factor_tipo": ciudad.factor_tipo,
+                         "consumo_base": ciudad.consumo_base,
+                         "fila": fila,
+                         "columna": columna}, copy=False)
+
+# ============================================================
+# ARCHIVOS COLUMNARES (Parquet / Arrow IPC)
+# ============================================================
+FORMATOS_EXPORTACION = ("parquet", "arrow")
+
+def _requiere_arrow():
+    if not ARROW_AVAILABLE:
+        raise ImportError("Parquet/Arrow requiere pyarrow (pip install pyarrow)")
+
+def a_tabla_arrow(df: "pd.DataFrame") -> "pa.Table":
+    """Tabla Arrow: columnas numéricas sin copiar y categóricas como diccionario (un RangeIndex va como metadato)"""
+    _requiere_arrow()
+    return pa.Table.from_pandas(df)
+
+def guardar_parquet(df: "pd.DataFrame", ruta: str, compresion: str = "zstd") -> str:
+    _requiere_arrow()
+    pq.write_table(a_tabla_arrow(df), ruta, compression=compresion)
+    return ruta
+
+def guardar_arrow(df: "pd.DataFrame", ruta: str) -> str:
+    """Arrow IPC (Feather v2) sin comprimir: se puede leer mapeando el archivo en memoria"""
+    _requiere_arrow()
+    feather.write_feather(a_tabla_arrow(df), ruta, compression="uncompressed")
+    return ruta
+
+def leer_tabla(ruta: str) -> "pd.DataFrame":
+    """Lee un .parquet, .arrow/.feather o .pkl escrito por este módulo"""
+    _requiere_pandas()
+    if ruta.endswith(".pkl"):
+        return pd.read_pickle(ruta)
+    _requiere_arrow()
+    if ruta.endswith(".parquet"):
+        return pq.read_table(ruta).to_pandas()
+    return feather.read_table(ruta, memory_map=True).to_pandas()
+
+def exportar_tabla(df: "pd.DataFrame", ruta_base: str, formato: str = "parquet") -> str:
+    """
+    Guarda con la extensión del formato ("parquet" o "arrow"). Sin pyarrow cae en un
+    pickle de pandas (binario, conserva las categorías). Devuelve la ruta escrita.
+    """
+    if formato not in FORMATOS_EXPORTACION:
+        raise ValueError(f"Formato desconocido '{formato}' (opciones: {', '.join(FORMATOS_EXPORTACION)})")
+    if not ARROW_AVAILABLE:
+        ruta = ruta_base + ".pkl"
+        df.to_pickle(ruta)
+        return ruta
+    if formato == "arrow":
+        return guardar_arrow(df, ruta_base + ".arrow")
+    return guardar_parquet(df, ruta_base + ".parquet")
+
+def exportar_resultado(resultado: ResultadoAnual, carpeta: str, nombre: str = None,
+                       formato: str = "parquet", catalogo: Dict[str, Dict] = None) -> List[str]:
+    """Horas y muestras de un ResultadoAnual en dos archivos columnares"""
+    os.makedirs(carpeta, exist_ok=True)
+    base = os.path.join(carpeta, nombre or f"resultado_{resultado.tipo}")
+    return [exportar_tabla(horas_a_dataframe(resultado, catalogo), base + "_horas", formato),
+            exportar_tabla(muestras_a_dataframe(resultado, catalogo), base + "_muestras", formato)]
+
+# ============================================================
+# TEST RÁPIDO
+# ============================================================
+if __name__ == "__main__":
+    import time
+    import tempfile
+    from motor_logico import generar_ciudad, simular_anio, encontrar_mejor_subestacion
+
+    # Diez años sembrados × tres subestaciones apilados (262.800 filas horarias)
+    eds = generar_ciudad(2000, semilla=0)
+    resultados = [simular_anio(tipo, eds, 0, 0, 0.01, semilla=anio)
+                  for anio in range(10) for tipo in ("Pequeña", "Mediana", "Grande")]
+    anual = resultados[0]
+    horas = horas_a_dataframe(anual)
+    print(f"Columna demanda sin copiar: {np.shares_memory(horas['demanda'].to_numpy(), anual.historial_horas)}")
+
+    todas = pd.concat([horas_a_dataframe(r) for r in resultados], ignore_index=True)
+    carpeta = tempfile.mkdtemp(prefix="exportar_")
+    ruta_csv = os.path.join(carpeta, "horas.csv")
+    todas.to_csv(ruta_csv, index=False)
+    for ruta in (exportar_tabla(todas, os.path.join(carpeta, "horas")),
+                 exportar_tabla(todas, os.path.join(carpeta, "horas"), "arrow"), ruta_csv):
+        t0 = time.perf_counter()
+        leida = leer_tabla(ruta) if not ruta.endswith(".csv") else pd.read_csv(ruta)
+        t = time.perf_counter() - t0
+        print(f"{os.path.basename(ruta):14s}: {len(leida):,} filas en {t * 1000:7.1f} ms "
+              f"({os.path.getsize(ruta) / 2**20:.1f} MiB) | subestacion: {leida['subestacion'].dtype}")
+
+    mejor, metricas = encontrar_mejor_subestacion(eds, 100, 0, prob_tormenta=0.01, semilla=1)
+    print(metricas_a_dataframe(metricas, mejor)[["tipo", "ganadora", "blackouts", "costo_ajustado"]])
+    print(ciudad_a_dataframe(eds).groupby("tipo", observed=False)["poblacion"].sum())
@@ -0,0 +1,166 @@
+import csv
+import importlib.util
+import numpy as np
+from collections import namedtuple
+from typing import List, Dict, Iterator, Iterable
+from motor_logico import (SUBESTACIONES, HORAS_ANIO, Edificio, TrazaDemanda, EstadoTormentas, ClimaContador,
+                          arrays_ciudad, generar_bloque_demanda, calcular_metricas_subestacion)
+# matplotlib se importa recién al graficar (y sin pyplot): importar flujo no cambia el
+# backend ni paga el import en procesos con pantalla, como la UI de pygame
+MATPLOTLIB_AVAILABLE = importlib.util.find_spec("matplotlib") is not None
+
+# ============================================================
+# GENERADORES DE LA SIMULACIÓN EN STREAMING
+# ============================================================
+RegistroHora = namedtuple("RegistroHora", ["dia", "hora", "demanda", "temperatura"])
+
+def iterar_bloques_demanda(edificios: List[Edificio], dia_inicio: int = 0, hora_inicio: int = 0,
+                           probabilidad_tormenta: float = 0.0, semilla: int = None,
+                           horas_bloque: int = 24 * 30, anios: int = 1) -> Iterator[TrazaDemanda]:
+    """
+    Produce la proyección en bloques de `horas_bloque` horas (arrays NumPy de tamaño fijo).
+    Solo un bloque vive en memoria a la vez, así que `anios` puede ser grande.
+    Los sorteos son por contador: el tamaño de bloque no cambia la proyección.
+    """
+    ciudad = arrays_ciudad(edificios)
+    clima = ClimaContador(semilla)
+    estado = EstadoTormentas()
+
+    tiempo = dia_inicio * 24 + hora_inicio
+    tiempo_fin = anios * HORAS_ANIO
+    while tiempo < tiempo_fin:
+        # Los bloques no cruzan el fin de año (el límite de tormentas es anual)
+        fin_anio = (tiempo // HORAS_ANIO + 1) * HORAS_ANIO
+        fin_bloque = min(tiempo + horas_bloque, fin_anio, tiempo_fin)
+        yield generar_bloque_demanda(ciudad, tiempo, fin_bloque, probabilidad_tormenta, clima, estado)
+        tiempo = fin_bloque
+        if tiempo % HORAS_ANIO == 0:
+            estado.generadas = 0
+
+def iterar_horas(bloques: Iterable[TrazaDemanda]) -> Iterator[RegistroHora]:
+    """Aplana los bloques en registros hora a hora (dia, hora, demanda, temperatura)"""
+    for bloque in bloques:
+        yield from map(RegistroHora._make, zip(bloque.dia.tolist(), bloque.hora.tolist(),
+                                               bloque.demanda.tolist(), bloque.temperatura.tolist()))
+
+def ejecutar_flujo(bloques: Iterable[TrazaDemanda], consumidores: List["ConsumidorFlujo"]) -> List:
+    """Entrega cada bloque a todos los consumidores y devuelve el resultado de cada uno"""
+    for bloque in bloques:
+        for consumidor in consumidores:
+            consumidor.consumir(bloque)
+    return [consumidor.cerrar() for consumidor in consumidores]
+
+# ============================================================
+# CONSUMIDORES
+# ============================================================
+class ConsumidorFlujo:
+    """Interfaz: recibe bloques con `consumir` y entrega su resultado en `cerrar`"""
+    def consumir(self, bloque: TrazaDemanda):
+        raise NotImplementedError
+
+    def cerrar(self):
+        return None
+
+class AgregadorBlackouts(ConsumidorFlujo):
+    """
+    Blackouts y demanda promedio de cada subestación en memoria constante.
+    Costos y confiabilidad siguen la convención anual de calcular_metricas_subestacion:
+    con más de un año de horas las métricas son por año (blackouts promediados) y
+    "blackouts_periodo" guarda el total.
+    """
+    def __init__(self, catalogo: Dict[str, Dict] = None):
+        self.catalogo = SUBESTACIONES if catalogo is None else catalogo
+        self.capacidades = np.array([d["capacidad_kw"] for d in self.catalogo.values()], dtype=np.float64)
+        self.blackouts = np.zeros(len(self.catalogo), dtype=np.int64)
+        self.suma_demanda = 0.0
+        self.horas = 0
+        self.pico = 0.0
+
+    def consumir(self, bloque: TrazaDemanda):
+        if len(bloque) == 0:
+            return
+        self.blackouts += bloque.curva_duracion().horas_sobre(self.capacidades)
+        self.suma_demanda += float(bloque.demanda.sum())
+        self.horas += len(bloque)
+        self.pico = max(self.pico, float(bloque.demanda.max()))
+
+    def cerrar(self) -> List[Dict]:
+        promedio = self.suma_demanda / self.horas if self.horas else 0.0
+        anios = max(1.0, self.horas / HORAS_ANIO)
+        resultados = []
+        for (tipo, datos), blackouts in zip(self.catalogo.items(), self.blackouts.tolist()):
+            por_anio = blackouts / anios if anios > 1 else blackouts
+            metricas = calcular_metricas_subestacion(tipo, datos, por_anio, promedio)
+            metricas["blackouts_periodo"] = blackouts
+            metricas["anios"] = round(anios, 3)
+            resultados.append(metricas)
+        return resultados
+
+class EscritorCSV(ConsumidorFlujo):
+    """Escribe cada hora en un CSV a medida que llegan los bloques"""
+    def __init__(self, ruta: str):
+        self.ruta = ruta
+        self._archivo = open(ruta, "w", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._archivo)
+        self._writer.writerow(RegistroHora._fields)
+
+    def consumir(self, bloque: TrazaDemanda):
+        self._writer.writerows(zip(bloque.dia.tolist(), bloque.hora.tolist(),
+                                   np.round(bloque.demanda, 3).tolist(),
+                                   np.round(bloque.temperatura, 2).tolist()))
+
+    def cerrar(self) -> str:
+        self._archivo.close()
+        return self.ruta
+
+class GraficoPicosDiarios(ConsumidorFlujo):
+    """Guarda solo el pico de cada día y, si hay matplotlib, lo grafica al cerrar"""
+    def __init__(self, ruta_png: str = None):
+        self.ruta_png = ruta_png
+        self.dias = []
+        self.picos = []
+
+    def consumir(self, bloque: TrazaDemanda):
+        if len(bloque) == 0:
+            return
+        inicios = np.r_[0, np.flatnonzero(np.diff(bloque.dia)) + 1]
+        dias = bloque.dia[inicios].tolist()
+        picos = np.maximum.reduceat(bloque.demanda, inicios).tolist()
+        # Un día puede quedar partido entre dos bloques
+        if self.dias and dias[0] == self.dias[-1]:
+            self.picos[-1] = max(self.picos[-1], picos.pop(0))
+            dias.pop(0)
+        self.dias.extend(dias)
+        self.picos.extend(picos)
+
+    def cerrar(self) -> Dict:
+        if self.ruta_png and MATPLOTLIB_AVAILABLE:
+            # Figura suelta (sin pyplot): se dibuja con Agg sin tocar el backend global
+            from matplotlib.figure import Figure
+            fig = Figure(figsize=(10, 3))
+            ax = fig.subplots()
+            ax.plot(self.dias, np.asarray(self.picos) / 1000)
+            ax.set_xlabel("Día")
+            ax.set_ylabel("Pico diario (MW)")
+            fig.tight_layout()
+            fig.savefig(self.ruta_png)
+        return {"dias": np.asarray(self.dias), "picos_kw": np.asarray(self.picos)}
+
+# ============================================================
+# TEST RÁPIDO
+# ============================================================
+if __name__ == "__main__":
+    from motor_logico import generar_ciudad
+
+    eds = generar_ciudad(200)
+    agregador = AgregadorBlackouts()
+    picos = GraficoPicosDiarios()
+    metricas, resumen = ejecutar_flujo(
+        iterar_bloques_demanda(eds, probabilidad_tormenta=0.01, semilla=1, anios=10),
+        [agregador, picos])
+
+    print(f"{agregador.horas} horas procesadas en bloques, pico {agregador.pico:,.0f} kW")
+    for m in metricas:
+        print(f"{m['tipo']}: {m['blackouts']:.1f} blackouts/año ({m['blackouts_periodo']} en {m['anios']:g} años) | "
+              f"confiabilidad {m['confiabilidad']}% | promedio {m['promedio_demanda_kw']:,.0f} kW")
+    print(f"Días registrados en el gráfico: {len(resumen['dias'])}")
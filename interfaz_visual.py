@@ -6,7 +6,10 @@ from collections import deque
 from config import (Palette, SimConfig, SUBESTACIONES_CONFIG, SCREEN_WIDTH, SCREEN_HEIGHT, FPS, 
                    HEADER_RECT, SIDEBAR_RECT, GRAPH_RECT, GRID_RECT,
                    HEADER_HEIGHT, SIDEBAR_WIDTH, GRID_HEIGHT, GRAPH_HEIGHT)
-from motor_logico import generar_ciudad, obtener_datos_snapshot, encontrar_mejor_subestacion, Edificio
+from motor_logico import generar_ciudad, obtener_datos_snapshot, Edificio
+from vista_ciudad import calcular_rects
+from cache_optimizador import CacheOptimizador, cuantizar_prob
+from optimizador_fondo import OptimizadorFondo
 from simulation_state import SimulationState
 try:
     from reportlab.lib.pagesizes import A4
@@ -124,6 +127,7 @@ class SimulacionUI:
         # Guardar el total de edificios en la clase compartida para uso posterior
         SimulationState.set_total_buildings(target_buildings)
         self.edificios = generar_ciudad(target_buildings)
+        self.rects = calcular_rects(self.edificios)  # Geometría en pantalla (mismo orden)
         self.particulas = []
         
         # Datos
@@ -138,6 +142,14 @@ class SimulacionUI:
         self.tormentas_count = 0
         self.historial_fallos = {"Pequeña": 0, "Mediana": 0, "Grande": 0}
         
+        # Optimizador: semilla fija por sesión para que repetir el cálculo use la caché
+        self.semilla_sesion = random.randrange(2**32)
+        self.cache_optimizador = CacheOptimizador()
+        self.proyeccion = None  # Año sembrado con la semilla de sesión (se crea al primer cálculo)
+        self.optimizador = None  # OptimizadorFondo en curso
+        self.opt_clave = None
+        self.opt_subestacion_previa = None
+        
         # Gráfica (Historial más largo para ver mejor)
         self.history_len = 800 
         self.graph_data = deque([0]*self.history_len, maxlen=self.history_len)
@@ -158,6 +170,7 @@ class SimulacionUI:
         self.init_layout()
         self.modal_active = False
         self.modal_data = None
+        self.modal_preliminar = False  # True mientras muestra estimaciones parciales
         self.hovered_edificio = None
 
     def check_hover(self):
@@ -167,8 +180,8 @@ class SimulacionUI:
         
         # Solo comprobar si no hay modales activos
         if not self.modal_active:
-            for ed in self.edificios:
-                if ed.rect.collidepoint(mx, my):
+            for ed, rect in zip(self.edificios, self.rects):
+                if rect.collidepoint(mx, my):
                     self.hovered_edificio = ed
                     break
 
@@ -330,6 +343,13 @@ class SimulacionUI:
     def handle_events(self):
         for e in pygame.event.get():
             if e.type == pygame.QUIT: return False
+            
+            # Mientras se proyecta: ESC o clic cancelan
+            if self.optimizador is not None:
+                if e.type == pygame.MOUSEBUTTONDOWN or (e.type == pygame.KEYDOWN and e.key == pygame.K_ESCAPE):
+                    self.cancelar_optimizacion()
+                continue
+            
             if e.type == pygame.MOUSEBUTTONDOWN:
                 mx, my = pygame.mouse.get_pos()
                 
@@ -383,15 +403,9 @@ class SimulacionUI:
         return True
 
     def run_optimization(self):
-        # Guardar la subestación actual antes de la simulación
-        subestacion_actual = self.sub_actual
-        
-        # Loading simple
-        self.screen.fill(Palette.BG_DARKEST)
-        t = self.font_lg.render("PROYECTANDO CIERRE DE AÑO...", True, Palette.CYAN)
-        tr = t.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2))
-        self.screen.blit(t, tr)
-        pygame.display.flip()
+        # Solo una proyección a la vez
+        if self.optimizador is not None:
+            return
         
         # Calcular probabilidad de tormenta (Eventos por hora)
         # Si hubo 5 tormentas en 10 días (240 horas) -> prob = 5/240
@@ -401,22 +415,72 @@ class SimulacionUI:
         # Forzar un mínimo si el usuario ha sido activo
         if self.tormentas_count > 0:
             prob_tormenta = max(prob_tormenta, 0.001) 
+        prob_tormenta = cuantizar_prob(prob_tormenta)
+
+        # Guardar la subestación actual antes de la simulación
+        self.opt_subestacion_previa = self.sub_actual
+        self.opt_clave = self.cache_optimizador.clave_incremental(
+            self.edificios, self.semilla_sesion, self.dia, self.hora, self.historial_fallos, prob_tormenta)
+        resultado = self.cache_optimizador.obtener(self.opt_clave)
+        if resultado is not None:
+            self.mostrar_optimizacion(*resultado)
+            return
 
-        best, res = encontrar_mejor_subestacion(
-            self.edificios, 
-            dia_actual=self.dia, 
-            hora_actual=self.hora, 
+        # Proyectar en segundo plano: la UI sigue dibujando y muestra el progreso.
+        # El año sembrado se construye en el hilo la primera vez y se reutiliza en los siguientes cálculos
+        self.optimizador = OptimizadorFondo(
+            self.edificios,
+            dia_actual=self.dia,
+            hora_actual=self.hora,
             historial_fallos=self.historial_fallos,
-            prob_tormenta=prob_tormenta
-        )
-        
-        self.modal_data = (best, res, subestacion_actual)
+            prob_tormenta=prob_tormenta,
+            semilla=self.semilla_sesion,
+            proyeccion=self.proyeccion,
+            incremental=True
+        ).iniciar()
+
+    def actualizar_optimizacion(self):
+        """Procesa los eventos del optimizador en segundo plano (se llama cada frame)"""
+        optimizador = self.optimizador
+        if optimizador is None:
+            return
+        for evento in optimizador.eventos():
+            if evento.tipo == "parcial":
+                # El modal se abre con la primera estimación y se refina mes a mes
+                best, res = evento.datos
+                self.modal_data = (best, res, self.opt_subestacion_previa)
+                self.modal_active = True
+                self.modal_preliminar = True
+            elif evento.tipo == "resultado":
+                self.cache_optimizador.guardar(self.opt_clave, evento.datos)
+                self.optimizador = None
+                self.mostrar_optimizacion(*evento.datos)
+            elif evento.tipo in ("cancelado", "error"):
+                if evento.tipo == "error":
+                    print(f"Error en la optimización: {evento.datos}")
+                self.optimizador = None
+                if self.modal_preliminar:
+                    self.modal_active = False
+                    self.modal_preliminar = False
+        # El hilo construye el año sembrado antes de publicar eventos: se guarda para los próximos cálculos
+        if self.proyeccion is None:
+            self.proyeccion = optimizador.proyeccion
+
+    def cancelar_optimizacion(self):
+        if self.optimizador is not None:
+            self.optimizador.cancelar()
+            self.audio.play_click()
+
+    def mostrar_optimizacion(self, best, res):
+        self.modal_data = (best, res, self.opt_subestacion_previa)
         self.modal_active = True
+        self.modal_preliminar = False
         # NO cambiamos automáticamente, el usuario debe decidir (o mantenemos la lógica anterior)
         # La lógica anterior cambiaba automáticamente:
         self.sub_actual = best
 
     def update(self):
+        self.actualizar_optimizacion()
         self.check_hover()
         if not self.pausado:
             # Tiempo
@@ -473,14 +537,14 @@ class SimulacionUI:
         self.graph_data.append(self.consumo_total)
         
         # Partículas
-        for e in self.edificios:
+        for e, rect in zip(self.edificios, self.rects):
             if e.tipo == 'industrial':
                 # Humo proporcional al consumo
                 act = e.consumo_actual
                 if self.modo_tormenta: act *= 2
                 
                 if random.random() < (act / 100000.0):
-                    self.particulas.append(Particle(e.rect.right-10, e.rect.top))
+                    self.particulas.append(Particle(rect.right-10, rect.top))
                     
         self.particulas = [p for p in self.particulas if p.update()]
         
@@ -517,9 +581,33 @@ class SimulacionUI:
         
         if self.modal_active:
             self.draw_modal()
+        
+        # Con estimaciones parciales el propio modal muestra el progreso
+        if self.optimizador is not None and not self.modal_active:
+            self.draw_progreso_optimizacion()
             
         pygame.display.flip()
 
+    def draw_progreso_optimizacion(self):
+        """Overlay con la barra de progreso de la proyección en segundo plano"""
+        s = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
+        s.fill((0,0,0,160))
+        self.screen.blit(s, (0,0))
+        
+        bw, bh = 420, 18
+        bx, by = (SCREEN_WIDTH - bw)//2, SCREEN_HEIGHT//2
+        opt = self.optimizador
+        
+        t = self.font_lg.render("PROYECTANDO CIERRE DE AÑO...", True, Palette.CYAN)
+        self.screen.blit(t, t.get_rect(center=(SCREEN_WIDTH//2, by - 30)))
+        
+        pygame.draw.rect(self.screen, (40,40,50), (bx, by, bw, bh), border_radius=8)
+        pygame.draw.rect(self.screen, Palette.CYAN, (bx, by, int(bw * opt.progreso), bh), border_radius=8)
+        
+        txt = f"Mes {opt.meses_hechos}/{opt.meses_totales}  |  ESC o clic para cancelar"
+        t = self.font_sl.render(txt, True, Palette.GRAY)
+        self.screen.blit(t, t.get_rect(center=(SCREEN_WIDTH//2, by + bh + 20)))
+
     def draw_header(self):
         r = HEADER_RECT
         pygame.draw.rect(self.screen, Palette.BG_HEADER, r)
@@ -616,8 +704,8 @@ class SimulacionUI:
         self.screen.blit(ot, tr)
 
     def draw_grid(self):
-        for e in self.edificios:
-            x, y, w, h = e.rect
+        for e, rect in zip(self.edificios, self.rects):
+            x, y, w, h = rect
             act = e.consumo_actual / (e.poblacion * 2.5) if e.poblacion else 0
             is_on = act > 0.2
             
@@ -716,13 +804,20 @@ class SimulacionUI:
 
         win, res, current_sub = self.modal_data
 
-        # Título principal
-        title = self.font_xl.render(f"SUBESTACIÓN ÓPTIMA: {win.upper()}", True, Palette.NEON_GREEN)
+        # Título principal (ámbar mientras la proyección no terminó)
+        if self.modal_preliminar:
+            progreso = res[0].get("progreso", 0.0) if res else 0.0
+            title = self.font_xl.render(f"PRELIMINAR: {win.upper()}", True, Palette.AMBER)
+            estado = f"Estimación con {progreso:.0%} del año proyectado  |  ESC o clic para cancelar"
+        else:
+            title = self.font_xl.render(f"SUBESTACIÓN ÓPTIMA: {win.upper()}", True, Palette.NEON_GREEN)
+            estado = "RESULTADO FINAL"
         tr = title.get_rect(center=(SCREEN_WIDTH//2, my + 35))
         self.screen.blit(title, tr)
 
         # Subtítulo con subestación actual
-        subtitle = self.font_md.render(f"Simulación realizada con subestación: {current_sub}", True, Palette.AMBER)
+        subtitle = self.font_md.render(f"Simulación realizada con subestación: {current_sub}  |  {estado}",
+                                       True, Palette.AMBER)
         sr = subtitle.get_rect(center=(SCREEN_WIDTH//2, my + 65))
         self.screen.blit(subtitle, sr)
 
@@ -938,6 +1033,13 @@ class SimulacionUI:
         os.makedirs(out_dir, exist_ok=True)
         path = os.path.join(out_dir, fname)
 
+        # Métricas en formato columnar junto al reporte (Parquet, o pickle de pandas sin pyarrow)
+        try:
+            from exportar import metricas_a_dataframe, exportar_tabla  # pandas solo al exportar
+            exportar_tabla(metricas_a_dataframe(res, win), path[:-len(".pdf")] + "_metricas")
+        except Exception:
+            pass
+
         if not REPORTLAB_AVAILABLE:
             # Fallback simple: guardar texto si reportlab no está disponible
             txt_path = path.replace('.pdf', '.txt')
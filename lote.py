@@ -0,0 +1,248 @@
+import os
+import io
+import csv
+import sys
+import json
+import time
+import argparse
+import contextlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List, Dict
+from motor_logico import (SUBESTACIONES, MOTORES_SIMULACION, generar_ciudad, simular_anio,
+                          encontrar_mejor_subestacion, metricas_catalogo, ResultadoAnual)
+try:
+    import yaml
+    YAML_AVAILABLE = True
+except ImportError:
+    YAML_AVAILABLE = False
+
+# ============================================================
+# ESCENARIOS (archivo JSON o YAML)
+# ============================================================
+# Ejemplo (JSON; en YAML las mismas claves):
+# {
+#   "catalogo": {"Pequeña": {}, "Mediana": {"costo_inversion": 100000}},   <- opcional, para todos
+#   "escenarios": [
+#     {"nombre": "centro", "edificios": 5000, "prob_tormenta": 0.01, "dia": 150, "hora": 0,
+#      "semillas": [1, 2, 3], "motor": "vectorizado", "poda": false}
+#   ]
+# }
+CAMPOS_SUBESTACION = ("capacidad_kw", "costo_inversion", "costo_operativo_hora")
+# El branch and bound genera la traza con ClimaContador: solo equivale al motor vectorizado
+MOTOR_PODA = "vectorizado"
+
+def cargar_archivo(ruta: str) -> Dict:
+    """Lee el archivo de escenarios según su extensión"""
+    with open(ruta, encoding="utf-8") as f:
+        if ruta.endswith((".yaml", ".yml")):
+            if not YAML_AVAILABLE:
+                raise ValueError("Para leer YAML hace falta PyYAML (pip install pyyaml)")
+            datos = yaml.safe_load(f)
+        else:
+            datos = json.load(f)
+    # También se acepta directamente la lista de escenarios
+    return {"escenarios": datos} if isinstance(datos, list) else datos
+
+def normalizar_catalogo(catalogo: Dict[str, Dict] = None) -> Dict[str, Dict]:
+    """Completa cada subestación con los datos de SUBESTACIONES (si existe) y valida los campos"""
+    if catalogo is None:
+        return SUBESTACIONES
+    normalizado = {}
+    for tipo, datos in catalogo.items():
+        completo = dict(SUBESTACIONES.get(tipo, {}), **(datos or {}))
+        faltan = [campo for campo in CAMPOS_SUBESTACION if campo not in completo]
+        if faltan:
+            raise ValueError(f"Subestación '{tipo}': faltan {', '.join(faltan)}")
+        normalizado[tipo] = completo
+    return normalizado
+
+def expandir_corridas(datos: Dict, poda: bool = False) -> List[Dict]:
+    """Una corrida por escenario y semilla, en el orden del archivo (`poda` la fuerza en todos)"""
+    catalogo_comun = datos.get("catalogo")
+    corridas = []
+    for i, esc in enumerate(datos.get("escenarios", [])):
+        nombre = str(esc.get("nombre", f"escenario_{i + 1}"))
+        if "edificios" not in esc:
+            raise ValueError(f"Escenario '{nombre}': falta 'edificios'")
+        motor = esc.get("motor", "vectorizado")
+        if motor not in MOTORES_SIMULACION:
+            raise ValueError(f"Escenario '{nombre}': motor desconocido '{motor}'")
+        poda_esc = poda or bool(esc.get("poda", False))
+        if poda_esc and motor != MOTOR_PODA:
+            raise ValueError(f"Escenario '{nombre}': la poda solo funciona con el motor '{MOTOR_PODA}', "
+                             f"no con '{motor}'")
+        catalogo = normalizar_catalogo(esc.get("catalogo", catalogo_comun))
+        semillas = esc.get("semillas", [esc.get("semilla", 0)])
+        for semilla in semillas:
+            corridas.append({
+                "escenario": nombre,
+                "edificios": int(esc["edificios"]),
+                "prob_tormenta": float(esc.get("prob_tormenta", 0.0)),
+                "dia": int(esc.get("dia", 0)),
+                "hora": int(esc.get("hora", 0)),
+                "semilla": int(semilla),
+                # La ciudad puede quedar fija mientras varía el clima
+                "semilla_ciudad": int(esc.get("semilla_ciudad", semilla)),
+                "motor": motor,
+                "poda": poda_esc,
+                "historial_fallos": esc.get("historial_fallos"),
+                "catalogo": catalogo,
+            })
+    return corridas
+
+# ============================================================
+# EJECUCIÓN
+# ============================================================
+def completar_resultados(resultados: List[Dict], ganadora: str, anual: ResultadoAnual,
+                         corrida: Dict) -> List[Dict]:
+    """
+    Todas las filas con las columnas de la poda y `analitico`. La fila de la ganadora se rehace
+    con su año completo (`anual`) si venía de cotas (poda) o del promedio esperado (analítica).
+    Las perdedoras resueltas sin simular quedan con horas_evaluadas=0.
+    """
+    horas = len(anual.historial_horas)
+    completos = []
+    for r in resultados:
+        if r["tipo"] == ganadora and (r.get("analitico") or "horas_evaluadas" in r):
+            promedio = float(anual.historial_horas.mean()) if horas else 0.0
+            r = metricas_catalogo([anual.blackouts], promedio, {ganadora: corrida["catalogo"][ganadora]},
+                                  corrida["historial_fallos"] or {})[0]
+            r["horas_evaluadas"] = horas
+        r = dict(r)
+        r.setdefault("analitico", False)
+        r.setdefault("horas_evaluadas", 0 if r["analitico"] else horas)
+        if "exacto" not in r:
+            r.update(fallos_min=r["blackouts_totales"], fallos_max=r["blackouts_totales"],
+                     costo_min=r["costo_ajustado"], costo_max=r["costo_ajustado"], exacto=True, podada=False)
+        completos.append(r)
+    return completos
+
+def ejecutar_corrida(corrida: Dict) -> Dict:
+    """Worker: genera la ciudad, elige la subestación y proyecta el año de la ganadora"""
+    t0 = time.perf_counter()
+    ciudad = generar_ciudad(corrida["edificios"], semilla=corrida["semilla_ciudad"], como_arrays=True)
+    # Los mensajes del optimizador son para la consola interactiva, no para un lote
+    with contextlib.redirect_stdout(io.StringIO()):
+        ganadora, resultados = encontrar_mejor_subestacion(
+            ciudad, corrida["dia"], corrida["hora"], corrida["historial_fallos"], corrida["prob_tormenta"],
+            corrida["motor"], corrida["semilla"], corrida["catalogo"], poda=corrida["poda"])
+        anual = simular_anio(ganadora, ciudad, corrida["dia"], corrida["hora"], corrida["prob_tormenta"],
+                             corrida["motor"], corrida["semilla"], datos=corrida["catalogo"][ganadora])
+    resultados = completar_resultados(resultados, ganadora, anual, corrida)
+    historial = anual.historial_demanda
+    return {
+        "escenario": corrida["escenario"],
+        "semilla": corrida["semilla"],
+        "edificios": corrida["edificios"],
+        "prob_tormenta": corrida["prob_tormenta"],
+        "dia": corrida["dia"],
+        "hora": corrida["hora"],
+        "motor": corrida["motor"],
+        "ganadora": ganadora,
+        "resultados": resultados,
+        "pico_kw": float(anual.historial_horas.max()) if len(anual.historial_horas) else 0.0,
+        "historial": {campo: historial[campo].tolist() for campo in historial.dtype.names},
+        "segundos": time.perf_counter() - t0,
+    }
+
+def ejecutar_lote(corridas: List[Dict], max_workers: int = None) -> List[Dict]:
+    """Corre todas las corridas (en un pool si hay más de un worker) y las devuelve en orden"""
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    salidas = [None] * len(corridas)
+
+    def avisar(i: int, salida: Dict):
+        hechas = sum(s is not None for s in salidas)
+        print(f"[{hechas}/{len(corridas)}] {salida['escenario']} (semilla {salida['semilla']}): "
+              f"{salida['ganadora']} en {salida['segundos']:.2f} s")
+
+    if max_workers <= 1:
+        for i, corrida in enumerate(corridas):
+            salidas[i] = ejecutar_corrida(corrida)
+            avisar(i, salidas[i])
+        return salidas
+
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futuros = {pool.submit(ejecutar_corrida, corrida): i for i, corrida in enumerate(corridas)}
+        for futuro in as_completed(futuros):
+            i = futuros[futuro]
+            salidas[i] = futuro.result()
+            avisar(i, salidas[i])
+    return salidas
+
+# ============================================================
+# SALIDA A DISCO
+# ============================================================
+def _json_seguro(valor):
+    """Convierte escalares NumPy para json.dump"""
+    return valor.item() if hasattr(valor, "item") else str(valor)
+
+def escribir_resultados(salidas: List[Dict], carpeta: str, con_historial: bool = False) -> List[str]:
+    """
+    resultados.json (todo), resumen.csv (una fila por subestación) y, opcional, historiales CSV.
+    Las filas podadas no son exactas: sus blackouts y costos son la cota inferior, entre costo_min y costo_max.
+    """
+    os.makedirs(carpeta, exist_ok=True)
+    rutas = []
+
+    ruta = os.path.join(carpeta, "resultados.json")
+    with open(ruta, "w", encoding="utf-8") as f:
+        json.dump([{k: v for k, v in s.items() if k != "historial"} for s in salidas], f,
+                  ensure_ascii=False, indent=2, default=_json_seguro)
+    rutas.append(ruta)
+
+    ruta = os.path.join(carpeta, "resumen.csv")
+    columnas = ("escenario", "semilla", "tipo", "ganadora", "capacidad_mw", "blackouts_futuros",
+                "confiabilidad_real", "costo_total", "costo_multas", "costo_ajustado", "eficiencia",
+                "horas_evaluadas", "analitico", "exacto", "podada", "costo_min", "costo_max")
+    with open(ruta, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(columnas)
+        for s in salidas:
+            for r in s["resultados"]:
+                fila = dict(r, escenario=s["escenario"], semilla=s["semilla"], ganadora=r["tipo"] == s["ganadora"])
+                writer.writerow([fila.get(c, "") for c in columnas])
+    rutas.append(ruta)
+
+    if con_historial:
+        carpeta_hist = os.path.join(carpeta, "historial")
+        os.makedirs(carpeta_hist, exist_ok=True)
+        for s in salidas:
+            ruta = os.path.join(carpeta_hist, f"{s['escenario']}_{s['semilla']}.csv")
+            with open(ruta, "w", newline="", encoding="utf-8") as f:
+                writer = csv.writer(f)
+                writer.writerow(s["historial"].keys())
+                writer.writerows(zip(*s["historial"].values()))
+            rutas.append(ruta)
+    return rutas
+
+# ============================================================
+# LÍNEA DE COMANDOS
+# ============================================================
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Corre escenarios de planificación sin pantalla y guarda los resultados.")
+    parser.add_argument("escenarios", help="Archivo de escenarios (.json, .yaml o .yml)")
+    parser.add_argument("-o", "--salida", default="resultados_lote", help="Carpeta de salida")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="Procesos (por defecto, todos los núcleos)")
+    parser.add_argument("--poda", action="store_true", help="Usar branch and bound en todos los escenarios")
+    parser.add_argument("--historial", action="store_true",
+                        help="Guardar también la demanda muestreada cada 6 horas de la ganadora")
+    args = parser.parse_args(argv)
+
+    try:
+        corridas = expandir_corridas(cargar_archivo(args.escenarios), poda=args.poda)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+    if not corridas:
+        parser.error("El archivo no tiene escenarios")
+
+    print(f"📦 {len(corridas)} corridas de {args.escenarios}")
+    t0 = time.perf_counter()
+    salidas = ejecutar_lote(corridas, args.workers)
+    rutas = escribir_resultados(salidas, args.salida, args.historial)
+    print(f"✅ Listo en {time.perf_counter() - t0:.1f} s -> {args.salida} ({len(rutas)} archivos)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
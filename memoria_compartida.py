@@ -0,0 +1,129 @@
+import pickle
+import numpy as np
+from multiprocessing import shared_memory
+from typing import List, Dict, Tuple
+from motor_logico import CiudadArrays, Edificio, arrays_ciudad
+
+# ============================================================
+# COLUMNAS DE LA CIUDAD EN MEMORIA COMPARTIDA
+# ============================================================
+# Columnas publicadas, en orden dentro del bloque compartido
+COLUMNAS_COMPARTIDAS = (("poblacion", np.float64), ("factor_tipo", np.float64),
+                        ("indice", np.int64), ("codigo_tipo", np.int8))
+
+# Bloques ya adjuntados en este proceso: nombre -> (SharedMemory, CiudadArrays)
+_ADJUNTAS: Dict[str, Tuple[shared_memory.SharedMemory, CiudadArrays]] = {}
+
+def _desplazamientos(n: int) -> List[Tuple[str, np.dtype, int]]:
+    """(columna, dtype, byte de inicio) de cada columna en un bloque de n edificios"""
+    posiciones, inicio = [], 0
+    for nombre, dtype in COLUMNAS_COMPARTIDAS:
+        posiciones.append((nombre, np.dtype(dtype), inicio))
+        inicio += n * np.dtype(dtype).itemsize
+    return posiciones
+
+def _bytes_bloque(n: int) -> int:
+    return max(1, sum(n * np.dtype(dtype).itemsize for _, dtype in COLUMNAS_COMPARTIDAS))
+
+def _vistas(buffer, n: int) -> Dict[str, np.ndarray]:
+    """Arrays NumPy sobre el bloque compartido (sin copiar)"""
+    return {nombre: np.ndarray(n, dtype=dtype, buffer=buffer, offset=inicio)
+            for nombre, dtype, inicio in _desplazamientos(n)}
+
+def _adjuntar(nombre: str) -> shared_memory.SharedMemory:
+    """Abre un bloque ajeno sin que este proceso lo borre al salir (lo libera quien lo creó)"""
+    try:
+        return shared_memory.SharedMemory(name=nombre, track=False)  # Python 3.13+
+    except TypeError:
+        # Los workers de un pool comparten el resource tracker del padre: registrar de nuevo
+        # el mismo nombre no cambia nada y el borrado sigue siendo del propietario
+        return shared_memory.SharedMemory(name=nombre)
+
+class CiudadCompartida:
+    """
+    Publica una sola vez población, factor, celda y tipo de cada edificio en memoria compartida.
+    Lo que viaja a los workers es solo el nombre del bloque y el tamaño (unos bytes, sea cual
+    sea la ciudad) y los 3 agregados por tipo; allí `arrays` adjunta el bloque la primera vez,
+    sin recorrer las columnas, y luego lo reutiliza.
+    Sirve en cualquier lugar que acepte edificios (arrays_ciudad usa `arrays`).
+    """
+    def __init__(self, edificios: List[Edificio]):
+        ciudad = arrays_ciudad(edificios)
+        self.n = len(ciudad)
+        self.filas = ciudad.filas
+        self.columnas = ciudad.columnas
+        self.consumo_base_por_tipo = tuple(ciudad.consumo_base_por_tipo.tolist())
+        self._shm = shared_memory.SharedMemory(create=True, size=_bytes_bloque(self.n))
+        self.nombre = self._shm.name
+        for columna, vista in _vistas(self._shm.buf, self.n).items():
+            vista[:] = getattr(ciudad, columna)
+        self.propietario = True
+
+    def __len__(self) -> int:
+        return self.n
+
+    @property
+    def arrays(self) -> CiudadArrays:
+        """Modelo vectorial sobre el bloque compartido (una vez por proceso)"""
+        if self.nombre not in _ADJUNTAS:
+            shm = self._shm if self.propietario else _adjuntar(self.nombre)
+            v = _vistas(shm.buf, self.n)
+            ciudad = CiudadArrays(v["poblacion"], v["factor_tipo"], v["codigo_tipo"], v["indice"],
+                                  self.filas, self.columnas, self.consumo_base_por_tipo)
+            _ADJUNTAS[self.nombre] = (shm, ciudad)
+        return _ADJUNTAS[self.nombre][1]
+
+    def __getstate__(self):
+        # Solo la referencia al bloque: nunca las columnas
+        return {"nombre": self.nombre, "n": self.n, "filas": self.filas, "columnas": self.columnas,
+                "consumo_base_por_tipo": self.consumo_base_por_tipo}
+
+    def __setstate__(self, estado):
+        self.__dict__.update(estado)
+        self._shm = None
+        self.propietario = False
+
+    def cerrar(self):
+        """Libera el bloque (solo quien lo creó lo borra del sistema)"""
+        adjunta = _ADJUNTAS.pop(self.nombre, None)
+        for shm in {id(x): x for x in (adjunta[0] if adjunta else None, self._shm) if x is not None}.values():
+            try:
+                shm.close()
+            except BufferError:
+                pass  # Quedan arrays vivos sobre el bloque: el mapeo se libera con ellos
+        if self.propietario and self._shm is not None:
+            self._shm.unlink()
+        self._shm = None
+
+    def __enter__(self) -> "CiudadCompartida":
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+# ============================================================
+# TEST RÁPIDO
+# ============================================================
+if __name__ == "__main__":
+    import os
+    import time
+    from motor_logico import generar_ciudad
+    from ensamble import simular_ensamble
+
+    eds = generar_ciudad(2 * 10**6, semilla=0, como_arrays=True)
+    with CiudadCompartida(eds) as compartida:
+        for nombre, ciudad in (("columnas", eds), ("compartida", compartida)):
+            t0 = time.perf_counter()
+            datos = pickle.dumps(ciudad)
+            pickle.loads(datos)
+            print(f"Por tarea ({nombre}): {len(datos):,} bytes, "
+                  f"{(time.perf_counter() - t0) * 1000:.2f} ms en serializar y cargar")
+
+        # Un proceso adjunto ve los mismos datos sin copiarlos
+        copia = pickle.loads(pickle.dumps(compartida))
+        print(f"Misma ciudad: {np.array_equal(copia.arrays.demanda_base_hora, eds.demanda_base_hora)}")
+
+        t0 = time.perf_counter()
+        mejor, _ = simular_ensamble(compartida, n_replicas=64, prob_tormenta=0.01, semilla=1,
+                                    max_workers=max(2, os.cpu_count() or 1))
+        print(f"Ensamble sobre memoria compartida: {mejor} en {time.perf_counter() - t0:.2f} s")
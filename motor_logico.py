@@ -1,8 +1,13 @@
 import random
 import simpy
 import math
+import sys
+import time
+import io
+import contextlib
+import functools
 from typing import List, Dict, Tuple
-import pygame
+import numpy as np
 from datetime import datetime, timedelta
 
 # ============================================================
@@ -35,43 +40,170 @@ SUBESTACIONES = {
     }
 }
 
+# ============================================================
+# FACTORES DE CONSUMO (Compartidos por el modelo escalar y vectorial)
+# ============================================================
+TIPOS_EDIFICIO = ("residencial", "comercial", "industrial")
+CODIGO_TIPO = {tipo: codigo for codigo, tipo in enumerate(TIPOS_EDIFICIO)}
+HORA_PICO_TIPO = {"residencial": 20, "comercial": 13, "industrial": 10}
+
+def factor_horario(tipo: str, hora_actual: int) -> float:
+    """Factor horario basado en curvas de consumo realistas"""
+    if tipo == "industrial":
+        # Industria: operación constante con ligero pico matutino
+        if 6 <= hora_actual <= 18:
+            return 0.8 + 0.2 * math.sin((hora_actual - 6) * math.pi / 12)
+        return 0.4  # Reducción nocturna
+    elif tipo == "comercial":
+        # Comercial: pico en horario laboral
+        if 8 <= hora_actual <= 18:
+            return 0.6 + 0.4 * math.sin((hora_actual - 8) * math.pi / 10)
+        elif 18 < hora_actual <= 22:
+            return 0.3  # Horario reducido
+        return 0.1  # Cierre nocturno
+    else:  # residencial
+        # Residencial: picos matutinos y nocturnos
+        if 6 <= hora_actual <= 9:
+            return 0.4 + 0.3 * math.sin((hora_actual - 6) * math.pi / 3)
+        elif 18 <= hora_actual <= 23:
+            return 0.5 + 0.5 * math.sin((hora_actual - 18) * math.pi / 5)
+        return 0.2  # Bajo consumo nocturno
+
+# Tablas de 24 horas por tipo: TABLA_FACTOR_HORA[codigo_tipo, hora]
+TABLA_FACTOR_HORA = np.array([[factor_horario(tipo, hora) for hora in range(24)]
+                              for tipo in TIPOS_EDIFICIO])
+TABLA_HORA_PICO = np.array([HORA_PICO_TIPO[tipo] for tipo in TIPOS_EDIFICIO])
+
+def factor_temperatura(temperatura):
+    """
+    Factor temperatura: impacto en HVAC (18-35°C).
+    Acepta un escalar o un array de temperaturas.
+    """
+    # Temperatura ideal: 22°C. Cada grado aumenta consumo
+    # Frío: calefacción (moderado)
+    # Calor: aire acondicionado (impacto EXTREMO)
+    # Aumentamos coeficiente de 0.04 a 0.12 para forzar picos altos
+    if isinstance(temperatura, (int, float)) or np.ndim(temperatura) == 0:
+        if temperatura <= 22:
+            return 1 + ((22 - temperatura) * 0.05)
+        return 1 + ((temperatura - 22) * 0.12)
+    temperatura = np.asarray(temperatura, dtype=np.float64)
+    return np.where(temperatura <= 22,
+                    1 + ((22 - temperatura) * 0.05),
+                    1 + ((temperatura - 22) * 0.12))
+
+def calcular_brillo(factor_hora, distancia_pico):
+    """Brillo visual según la distancia a la hora pico (escalar o array)"""
+    if np.ndim(distancia_pico) == 0:
+        if distancia_pico <= 1:
+            return 1.0 + (factor_hora * 0.8)
+        elif distancia_pico <= 3:
+            return 0.9 + (factor_hora * 0.4)
+        return 0.6 + (factor_hora * 0.2)
+    return np.where(distancia_pico <= 1, 1.0 + (factor_hora * 0.8),
+                    np.where(distancia_pico <= 3, 0.9 + (factor_hora * 0.4),
+                             0.6 + (factor_hora * 0.2)))
+
+# ============================================================
+# PERFILES DE TIPO (Flyweight compartido por todos los edificios)
+# ============================================================
+class PerfilTipo:
+    """Constantes de un tipo de edificio; una sola instancia por tipo"""
+    __slots__ = ("tipo", "codigo", "color_base", "color_brillo", "hora_pico",
+                 "factor_tipo", "forma", "poblacion_min", "poblacion_max")
+
+    def __init__(self, tipo: str, color_base: Tuple[int, int, int], color_brillo: Tuple[int, int, int],
+                 hora_pico: int, factor_tipo: float, forma: str, poblacion_min: int, poblacion_max: int):
+        self.tipo = tipo
+        self.codigo = CODIGO_TIPO[tipo]
+        self.color_base = color_base
+        self.color_brillo = color_brillo
+        self.hora_pico = hora_pico
+        self.factor_tipo = factor_tipo
+        self.forma = forma
+        self.poblacion_min = poblacion_min
+        self.poblacion_max = poblacion_max
+
+    def __repr__(self) -> str:
+        return f"PerfilTipo({self.tipo!r})"
+
+    def __reduce__(self):
+        # Al deserializar se reutiliza el perfil compartido del proceso
+        return (perfil_tipo, (self.tipo,))
+
+PERFILES_TIPO = {
+    "residencial": PerfilTipo("residencial",
+                              color_base=(96, 165, 250),    # Azul neón base
+                              color_brillo=(59, 130, 246),  # Azul brillante
+                              hora_pico=HORA_PICO_TIPO["residencial"],  # 8 PM
+                              factor_tipo=0.4,  # kW por persona base
+                              forma="casa", poblacion_min=2, poblacion_max=10),
+    "comercial": PerfilTipo("comercial",
+                            color_base=(74, 222, 128),    # Verde neón base
+                            color_brillo=(34, 197, 94),   # Verde brillante
+                            hora_pico=HORA_PICO_TIPO["comercial"],  # 1 PM
+                            factor_tipo=0.6,  # Más consumo por persona
+                            forma="oficina", poblacion_min=50, poblacion_max=300),
+    "industrial": PerfilTipo("industrial",
+                             color_base=(248, 113, 113),   # Rojo neón base
+                             color_brillo=(239, 68, 68),   # Rojo brillante
+                             hora_pico=HORA_PICO_TIPO["industrial"],  # 10 AM
+                             factor_tipo=0.9,  # Mucho consumo (maquinaria)
+                             forma="fabrica", poblacion_min=50, poblacion_max=500),
+}
+
+def perfil_tipo(tipo: str) -> PerfilTipo:
+    """Perfil compartido del tipo (cualquier tipo desconocido se trata como industrial)"""
+    return PERFILES_TIPO.get(tipo, PERFILES_TIPO["industrial"])
+
 # ============================================================
 # CLASE EDIFICIO (Versión Mejorada con Población y Tipo)
 # ============================================================
 class Edificio:
-    def __init__(self, x: int, y: int, ancho: int, alto: int, tipo: str):
-        self.rect = pygame.Rect(x, y, ancho, alto)
-        self.tipo = tipo
-        self.consumo_actual = 0.0
+    """
+    Modelo de datos de un edificio (sin geometría de pantalla).
+    `indice` es su celda en el grid (fila × columnas + columna); el rect lo calcula vista_ciudad.
+    Las constantes del tipo viven en `perfil` (compartido); cada instancia solo guarda su estado.
+    """
+    __slots__ = ("perfil", "poblacion", "indice", "consumo_actual", "brillo")
+
+    def __init__(self, tipo: str, indice: int = 0, poblacion: int = None):
+        self.perfil = perfil_tipo(tipo)
+        self.indice = indice
         self.brillo = 1.0
         
-        # Población aleatoria según tipo (rango 100-2000)
-        if self.tipo == "residencial":
-            self.poblacion = random.randint(2, 10)
-            self.color_base = (96, 165, 250)    # Azul neón base
-            self.color_brillo = (59, 130, 246)  # Azul brillante
-            self.hora_pico = 20  # 8 PM
-            self.factor_tipo = 0.4  # kW por persona base
-            self.forma = "casa"
-            
-        elif self.tipo == "comercial":
-            self.poblacion = random.randint(50, 300)
-            self.color_base = (74, 222, 128)    # Verde neón base
-            self.color_brillo = (34, 197, 94)   # Verde brillante
-            self.hora_pico = 13  # 1 PM
-            self.factor_tipo = 0.6  # Más consumo por persona
-            self.forma = "oficina"
-            
-        else:  # industrial
-            self.poblacion = random.randint(50, 500)
-            self.color_base = (248, 113, 113)   # Rojo neón base
-            self.color_brillo = (239, 68, 68)   # Rojo brillante
-            self.hora_pico = 10  # 10 AM
-            self.factor_tipo = 0.9  # Mucho consumo (maquinaria)
-            self.forma = "fabrica"
+        # Población aleatoria según el rango del tipo (si no viene dada)
+        if poblacion is None:
+            poblacion = random.randint(self.perfil.poblacion_min, self.perfil.poblacion_max)
+        self.poblacion = poblacion
         
         # Inicializar consumo
-        self.consumo_actual = self.poblacion * self.factor_tipo * 0.3
+        self.consumo_actual = self.poblacion * self.perfil.factor_tipo * 0.3
+
+    # Constantes de tipo (solo lectura, delegadas al perfil)
+    @property
+    def tipo(self) -> str:
+        return self.perfil.tipo
+
+    @property
+    def color_base(self) -> Tuple[int, int, int]:
+        return self.perfil.color_base
+
+    @property
+    def color_brillo(self) -> Tuple[int, int, int]:
+        return self.perfil.color_brillo
+
+    @property
+    def hora_pico(self) -> int:
+        return self.perfil.hora_pico
+
+    @property
+    def factor_tipo(self) -> float:
+        return self.perfil.factor_tipo
+
+    @property
+    def forma(self) -> str:
+        return self.perfil.forma
     
     def calcular_consumo(self, hora_actual: int, temperatura: float) -> float:
         """
@@ -79,120 +211,123 @@ class Edificio:
         """
         # Consumo base por población
         consumo_base = self.poblacion * self.factor_tipo
-        
-        # Factor horario basado en curvas de consumo realistas
-        if self.tipo == "industrial":
-            # Industria: operación constante con ligero pico matutino
-            if 6 <= hora_actual <= 18:
-                factor_hora = 0.8 + 0.2 * math.sin((hora_actual - 6) * math.pi / 12)
-            else:
-                factor_hora = 0.4  # Reducción nocturna
-        elif self.tipo == "comercial":
-            # Comercial: pico en horario laboral
-            if 8 <= hora_actual <= 18:
-                factor_hora = 0.6 + 0.4 * math.sin((hora_actual - 8) * math.pi / 10)
-            elif 18 < hora_actual <= 22:
-                factor_hora = 0.3  # Horario reducido
-            else:
-                factor_hora = 0.1  # Cierre nocturno
-        else:  # residencial
-            # Residencial: picos matutinos y nocturnos
-            if 6 <= hora_actual <= 9:
-                factor_hora = 0.4 + 0.3 * math.sin((hora_actual - 6) * math.pi / 3)
-            elif 18 <= hora_actual <= 23:
-                factor_hora = 0.5 + 0.5 * math.sin((hora_actual - 18) * math.pi / 5)
-            else:
-                factor_hora = 0.2  # Bajo consumo nocturno
-        
-        # Factor temperatura: impacto en HVAC (18-35°C)
-        # Temperatura ideal: 22°C. Cada grado aumenta consumo
-        if temperatura <= 22:
-            # Frío: calefacción (moderado)
-            factor_temperatura = 1 + ((22 - temperatura) * 0.05)
-        else:
-            # Calor: aire acondicionado (impacto EXTREMO)
-            # Aumentamos coeficiente de 0.04 a 0.12 para forzar picos altos
-            factor_temperatura = 1 + ((temperatura - 22) * 0.12)
+        factor_hora = factor_horario(self.tipo, hora_actual)
         
         # Calcular brillo para efectos visuales (glow en horas pico)
-        if abs(hora_actual - self.hora_pico) <= 1:
-            self.brillo = 1.0 + (factor_hora * 0.8)
-        elif abs(hora_actual - self.hora_pico) <= 3:
-            self.brillo = 0.9 + (factor_hora * 0.4)
-        else:
-            self.brillo = 0.6 + (factor_hora * 0.2)
+        self.brillo = calcular_brillo(factor_hora, abs(hora_actual - self.hora_pico))
         
         # Aplicar fórmula exacta
-        self.consumo_actual = consumo_base * factor_hora * factor_temperatura
+        self.consumo_actual = consumo_base * factor_hora * factor_temperatura(temperatura)
         return self.consumo_actual
-    
-    def dibujar(self, screen):
-        """Dibujar el edificio según su tipo"""
-        color = (
-            min(255, int(self.color_base[0] * self.brillo)),
-            min(255, int(self.color_base[1] * self.brillo)),
-            min(255, int(self.color_base[2] * self.brillo))
-        )
-        
-        # Dibujar base del edificio
-        pygame.draw.rect(screen, color, self.rect, border_radius=5)
+
+# ============================================================
+# MODELO VECTORIAL DE LA CIUDAD (Struct-of-Arrays)
+# ============================================================
+class CiudadArrays:
+    """
+    Columnas NumPy de la ciudad: un elemento por edificio.
+    Con `consumo_base_por_tipo` ya calculado (p. ej. al adjuntar memoria compartida) no se
+    recorren las columnas: el consumo base por edificio se calcula solo si se pide.
+    """
+    def __init__(self, poblacion, factor_tipo, codigo_tipo, indice=None,
+                 filas: int = 0, columnas: int = 0, consumo_base_por_tipo=None):
+        self.poblacion = np.asarray(poblacion, dtype=np.float64)
+        self.factor_tipo = np.asarray(factor_tipo, dtype=np.float64)
+        self.codigo_tipo = np.asarray(codigo_tipo, dtype=np.int8)
+        # Celda de cada edificio en el grid (fila × columnas + columna)
+        if indice is None:
+            indice = np.arange(len(self.poblacion))
+        self.indice = np.asarray(indice, dtype=np.int64)
+        self.filas = filas
+        self.columnas = columnas
+        self._consumo_base = None
+        # Agregado por tipo: Σ(Población × FactorEdificio) de cada tipo
+        if consumo_base_por_tipo is None:
+            consumo_base_por_tipo = np.bincount(
+                self.codigo_tipo, weights=self.consumo_base, minlength=len(TIPOS_EDIFICIO))
+        self.consumo_base_por_tipo = np.asarray(consumo_base_por_tipo, dtype=np.float64)
+        # Demanda de toda la ciudad a 22°C (factor temperatura = 1) para cada hora
+        self.demanda_base_hora = self.consumo_base_por_tipo @ TABLA_FACTOR_HORA
+
+    @property
+    def consumo_base(self) -> np.ndarray:
+        """Consumo base (Población × FactorEdificio) de cada edificio, invariante en el tiempo"""
+        if self._consumo_base is None:
+            self._consumo_base = self.poblacion * self.factor_tipo
+        return self._consumo_base
         
-        # Dibujar detalles según tipo
-        if self.forma == "casa":
-            # Techo triangular
-            puntos = [
-                (self.rect.centerx, self.rect.top - 5),
-                (self.rect.left, self.rect.top + 15),
-                (self.rect.right, self.rect.top + 15)
-            ]
-            pygame.draw.polygon(screen, color, puntos)
-            # Ventanas
-            for i in range(2):
-                ventana_rect = pygame.Rect(
-                    self.rect.left + 5 + i * 15,
-                    self.rect.top + 20,
-                    8, 10
-                )
-                pygame.draw.rect(screen, (255, 255, 200), ventana_rect)
-                
-        elif self.forma == "oficina":
-            # Ventanas rectangulares
-            for i in range(3):
-                for j in range(2):
-                    ventana_rect = pygame.Rect(
-                        self.rect.left + 10 + i * 18,
-                        self.rect.top + 15 + j * 20,
-                        12, 15
-                    )
-                    pygame.draw.rect(screen, (255, 255, 200), ventana_rect)
-                    
-        else:  # fabrica
-            # Chimenea
-            chimenea_rect = pygame.Rect(
-                self.rect.right - 15,
-                self.rect.top - 20,
-                8, 20
-            )
-            pygame.draw.rect(screen, (100, 100, 100), chimenea_rect)
-            # Humo
-            for i in range(3):
-                pygame.draw.circle(screen, (200, 200, 200),
-                                 (self.rect.right - 11, self.rect.top - 25 - i * 5), 4)
+    @classmethod
+    def desde_edificios(cls, edificios: List[Edificio]) -> "CiudadArrays":
+        perfiles = [ed.perfil for ed in edificios]
+        return cls([ed.poblacion for ed in edificios],
+                   [p.factor_tipo for p in perfiles],
+                   [p.codigo for p in perfiles],
+                   [ed.indice for ed in edificios],
+                   getattr(edificios, "filas", 0), getattr(edificios, "columnas", 0))
+    
+    def __len__(self) -> int:
+        return len(self.poblacion)
+
+    def coordenadas_grid(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Fila y columna de cada edificio"""
+        return np.divmod(self.indice, max(self.columnas, 1))
+
+    def a_edificios(self) -> List[Edificio]:
+        """Objetos Edificio equivalentes (mismo orden, tipo, celda y población)"""
+        return [Edificio(TIPOS_EDIFICIO[codigo], indice, poblacion)
+                for codigo, indice, poblacion in zip(self.codigo_tipo.tolist(), self.indice.tolist(),
+                                                     self.poblacion.astype(np.int64).tolist())]
+
+class Ciudad(list):
+    """Lista de edificios que conserva además su modelo vectorial y el tamaño del grid"""
+    def __init__(self, edificios: List[Edificio] = (), filas: int = 0, columnas: int = 0,
+                 arrays: CiudadArrays = None):
+        super().__init__(edificios)
+        self.filas = filas
+        self.columnas = columnas
+        self.arrays = CiudadArrays.desde_edificios(self) if arrays is None else arrays
+
+def arrays_ciudad(edificios: List[Edificio]) -> CiudadArrays:
+    """Devuelve el modelo vectorial (construyéndolo si es una lista simple)"""
+    if isinstance(edificios, CiudadArrays):
+        return edificios
+    arrays = getattr(edificios, "arrays", None)
+    if arrays is None:
+        arrays = CiudadArrays.desde_edificios(edificios)
+    return arrays
+
+def calcular_consumo_vectorizado(ciudad: CiudadArrays, hora: int, temperatura: float) -> np.ndarray:
+    """Consumo de todos los edificios en una sola llamada (misma fórmula que Edificio)"""
+    factor_hora = TABLA_FACTOR_HORA[:, hora][ciudad.codigo_tipo]
+    return ciudad.consumo_base * factor_hora * factor_temperatura(temperatura)
+
+def calcular_brillo_vectorizado(ciudad: CiudadArrays, hora: int) -> np.ndarray:
+    """Brillo visual de todos los edificios para la hora dada"""
+    factor_hora = TABLA_FACTOR_HORA[:, hora][ciudad.codigo_tipo]
+    distancia = np.abs(hora - TABLA_HORA_PICO[ciudad.codigo_tipo])
+    return calcular_brillo(factor_hora, distancia)
+
+def demanda_por_tipo(ciudad: CiudadArrays, hora: int, temperatura: float) -> np.ndarray:
+    """Demanda agregada de cada tipo en O(tipos), sin recorrer los edificios"""
+    return ciudad.consumo_base_por_tipo * TABLA_FACTOR_HORA[:, hora] * factor_temperatura(temperatura)
+
+def demanda_ciudad(ciudad: CiudadArrays, hora: int, temperatura: float) -> float:
+    """Demanda total de la ciudad en O(1) usando el agregado por tipo"""
+    return float(ciudad.demanda_base_hora[hora] * factor_temperatura(temperatura))
 
 # ============================================================
 # GENERADOR DE CIUDAD
 # ============================================================
-def generar_ciudad(target_edificios: int = 50) -> List[Edificio]:
-    """Genera la matriz de edificios ajustada al GRID_RECT y la cantidad solicitada"""
-    edificios = []
-    tipos = ["residencial", "comercial", "industrial"]
-    pesos = [0.5, 0.3, 0.2]
-    
+PESOS_TIPO = (0.5, 0.3, 0.2)  # Probabilidad de cada tipo (orden de TIPOS_EDIFICIO)
+FACTOR_TIPO_CODIGO = np.array([PERFILES_TIPO[tipo].factor_tipo for tipo in TIPOS_EDIFICIO])
+POBLACION_MIN_CODIGO = np.array([PERFILES_TIPO[tipo].poblacion_min for tipo in TIPOS_EDIFICIO], dtype=np.float64)
+POBLACION_MAX_CODIGO = np.array([PERFILES_TIPO[tipo].poblacion_max for tipo in TIPOS_EDIFICIO], dtype=np.float64)
+
+def dimensiones_grid(target_edificios: int) -> Tuple[int, int]:
+    """Filas y columnas del grid ajustadas al aspecto del GRID_RECT"""
     from config import GRID_RECT, GRID_MARGIN_X, GRID_MARGIN_Y
     
     # Área disponible para el grid
-    start_x = GRID_RECT[0] + GRID_MARGIN_X
-    start_y = GRID_RECT[1] + GRID_MARGIN_Y
     available_w = GRID_RECT[2] - (2 * GRID_MARGIN_X)
     available_h = GRID_RECT[3] - (2 * GRID_MARGIN_Y)
 
@@ -202,7 +337,6 @@ def generar_ciudad(target_edificios: int = 50) -> List[Edificio]:
     # cols * filas = target
     # cols / filas = aspect_ratio  => cols = filas * aspect_ratio
     # (filas * aspect_ratio) * filas = target => filas^2 = target / aspect_ratio
-    
     calc_filas = math.sqrt(target_edificios / aspect_ratio)
     rows = max(2, round(calc_filas))
     cols = max(2, round(target_edificios / rows))
@@ -213,265 +347,1205 @@ def generar_ciudad(target_edificios: int = 50) -> List[Edificio]:
             cols += 1
         else:
             rows += 1
+    return rows, cols
 
-    # Tamaño de celda
-    cell_w = available_w // cols
-    cell_h = available_h // rows
-    
-    # Margen entre edificios
-    gap = max(5, int(min(cell_w, cell_h) * 0.15)) # Gap dinámico
-    edificio_w = cell_w - gap
-    edificio_h = cell_h - gap
+def generar_ciudad_arrays(target_edificios: int = 50, semilla: int = None) -> CiudadArrays:
+    """
+    Genera la ciudad directamente como columnas NumPy (tipos, poblaciones y celdas en bloque).
+    Escala a millones de edificios sin crear un objeto por celda.
+    """
+    rng = np.random.default_rng(semilla)
+    rows, cols = dimensiones_grid(target_edificios)
 
-    contador_industrias = 0
+    # Elegimos todos los tipos al azar de una vez (umbrales acumulados sobre un uniforme)
+    sorteo = rng.random(target_edificios)
+    codigos = np.zeros(target_edificios, dtype=np.int8)
+    for umbral in np.cumsum(PESOS_TIPO)[:-1]:
+        codigos += sorteo >= umbral
+
+    # CONDICIONAL: las industriales que superan el límite pasan a residenciales (en orden de celda)
     limite_industrias = (rows * cols) // 8  # Máximo 12.5% industriales
+    industriales = np.flatnonzero(codigos == CODIGO_TIPO["industrial"])
+    codigos[industriales[limite_industrias:]] = CODIGO_TIPO["residencial"]
+
+    # Población uniforme en el rango de cada tipo (extremos incluidos)
+    minimo = POBLACION_MIN_CODIGO[codigos]
+    rango = POBLACION_MAX_CODIGO[codigos] - minimo + 1
+    poblacion = np.floor(rng.random(target_edificios) * rango) + minimo
+
+    return CiudadArrays(poblacion, FACTOR_TIPO_CODIGO[codigos], codigos,
+                        np.arange(target_edificios), rows, cols)
+
+def generar_ciudad(target_edificios: int = 50, semilla: int = None, como_arrays: bool = False):
+    """
+    Genera la matriz de edificios ajustada al GRID_RECT y la cantidad solicitada.
+    Solo decide tipo y celda de cada edificio; la geometría en pantalla es de vista_ciudad.
+    Con `como_arrays=True` devuelve el CiudadArrays sin crear objetos Edificio.
+    """
+    arrays = generar_ciudad_arrays(target_edificios, semilla)
+    if como_arrays:
+        return arrays
+    return Ciudad(arrays.a_edificios(), arrays.filas, arrays.columnas, arrays)
+
+# ============================================================
+# CLIMA, TORMENTAS Y TRAZA DE DEMANDA
+# ============================================================
+HORAS_ANIO = 365 * 24
+MAX_TORMENTAS = 60  # Límite duro de tormentas anuales
+RANGO_TEMP = (18.0, 35.0)        # La temperatura horaria se recorta a este rango
+FACTOR_TORMENTA = (1.5, 2.5)     # Multiplicador de demanda durante una tormenta
+DURACION_TORMENTA = (2, 6)       # Horas que dura una tormenta (extremos incluidos)
+
+# Rango de temperatura base por estación: Verano, Otoño, Invierno, Primavera
+RANGOS_TEMP_ESTACION = np.array([[28.0, 35.0], [22.0, 28.0], [18.0, 25.0], [20.0, 30.0]])
+
+def variacion_temp_horaria(hora_dia: int) -> float:
+    """Desplazamiento de la temperatura base según la hora del día"""
+    if 6 <= hora_dia <= 14:
+        return (hora_dia - 6) * 0.8
+    elif 14 < hora_dia <= 20:
+        return (20 - hora_dia) * 0.4
+    return -2
+
+TABLA_VARIACION_TEMP = np.array([variacion_temp_horaria(hora) for hora in range(24)])
+
+# Criterios del optimizador
+COSTO_HORA_BLACKOUT = 500     # Penalización económica por hora sin luz
+CONFIABILIDAD_MINIMA = 95.0   # % mínimo para considerar viable una subestación
+
+def confiabilidad_real(fallos_totales: int) -> float:
+    """Confiabilidad (%) del año completo combinando fallos pasados y futuros"""
+    return max(0, 100 * (1 - (fallos_totales / HORAS_ANIO)))
+
+@functools.lru_cache(maxsize=1024)
+def horas_blackout_permitidas(confiabilidad_objetivo: float, fallos_pasados: int = 0) -> int:
+    """Máximo de horas de blackout futuras con confiabilidad real > objetivo (None si ninguna)"""
+    limite = int(HORAS_ANIO * (1 - confiabilidad_objetivo / 100)) + 1
+    for horas in range(limite - fallos_pasados, -1, -1):
+        if confiabilidad_real(fallos_pasados + horas) > confiabilidad_objetivo:
+            return horas
+    return None
+
+class EstadoTormentas:
+    """Estado de tormentas que cruza de un bloque de horas al siguiente"""
+    def __init__(self):
+        self.restante = 0    # Horas de tormenta pendientes al inicio del próximo bloque
+        self.generadas = 0   # Tormentas iniciadas en el año en curso
+
+def programar_tormentas(sorteo: np.ndarray, probabilidad: float,
+                        duraciones: np.ndarray, max_tormentas: int = MAX_TORMENTAS,
+                        estado: EstadoTormentas = None) -> np.ndarray:
+    """
+    Resuelve las tormentas en orden a partir de sorteos por hora.
+    Una tormenta iniciada en la hora i afecta las horas i+1 .. i+duración,
+    y no puede iniciarse otra mientras está activa.
+    Con `estado` continúa una tormenta del bloque anterior y lo actualiza al final.
+    """
+    if estado is None:
+        estado = EstadoTormentas()
+    n = len(sorteo)
+    mascara = np.zeros(n, dtype=bool)
+    mascara[:estado.restante] = True
+    libre_desde = estado.restante
+    generadas = estado.generadas
+    for i in np.flatnonzero(sorteo < probabilidad).tolist():
+        if generadas >= max_tormentas:
+            break
+        if i < libre_desde:
+            continue
+        duracion = int(duraciones[i])
+        mascara[i + 1:i + 1 + duracion] = True
+        libre_desde = i + duracion + 1
+        generadas += 1
+    estado.restante = max(0, libre_desde - n)
+    estado.generadas = generadas
+    return mascara
+
+class CurvaDuracionCarga:
+    """
+    Curva de duración de carga: demandas horarias ordenadas.
+    Las horas de blackout de cualquier capacidad salen de una búsqueda binaria.
+    """
+    def __init__(self, demanda: np.ndarray):
+        self.demanda_ordenada = np.sort(demanda)  # Ascendente (para searchsorted)
+        self.horas = len(self.demanda_ordenada)
+    
+    def curva(self) -> np.ndarray:
+        """Demanda de mayor a menor (forma clásica de la curva)"""
+        return self.demanda_ordenada[::-1]
+    
+    def horas_sobre(self, capacidad_kw):
+        """Horas con demanda > capacidad (acepta un escalar o un array de capacidades)"""
+        horas = self.horas - np.searchsorted(self.demanda_ordenada, capacidad_kw, side="right")
+        return int(horas) if np.ndim(horas) == 0 else horas
+    
+    def capacidad_minima(self, horas_permitidas: int) -> float:
+        """Menor capacidad que deja como máximo `horas_permitidas` horas de blackout"""
+        if horas_permitidas >= self.horas:
+            return 0.0
+        return float(self.demanda_ordenada[self.horas - 1 - horas_permitidas])
+    
+    def capacidad_para_confiabilidad(self, confiabilidad_objetivo: float = 95.0,
+                                     fallos_pasados: int = 0) -> float:
+        """
+        Capacidad mínima cuya confiabilidad real supera el objetivo (mismo criterio
+        que el optimizador). Devuelve None si los fallos pasados ya lo impiden.
+        """
+        permitidas = horas_blackout_permitidas(confiabilidad_objetivo, fallos_pasados)
+        if permitidas is None:
+            return None
+        return self.capacidad_minima(permitidas)
+
+class TrazaDemanda:
+    """Serie horaria de demanda de una proyección (no depende de la subestación)"""
+    def __init__(self, tiempo_inicio: int, demanda: np.ndarray, temperatura: np.ndarray):
+        self.tiempo_inicio = tiempo_inicio
+        self.demanda = demanda
+        self.temperatura = temperatura
+        tiempo = np.arange(tiempo_inicio, tiempo_inicio + len(demanda))
+        self.dia = tiempo // 24
+        self.hora = tiempo % 24
+        self._curva = None
+        
+    def __len__(self) -> int:
+        return len(self.demanda)
+    
+    def contar_blackouts(self, capacidad_kw: float) -> int:
+        """Horas en que la demanda supera la capacidad"""
+        return self.curva_duracion().horas_sobre(capacidad_kw)
+    
+    def curva_duracion(self) -> CurvaDuracionCarga:
+        """Curva de duración de carga (se ordena una sola vez)"""
+        if self._curva is None:
+            self._curva = CurvaDuracionCarga(self.demanda)
+        return self._curva
     
-    count = 0
-    for fil in range(rows):
-        for col in range(cols):
-            if count >= target_edificios: break
-            
-            x = start_x + (col * cell_w) + (gap // 2)
-            y = start_y + (fil * cell_h) + (gap // 2)
-
-            # Elegimos un tipo al azar
-            tipo = random.choices(tipos, weights=pesos)[0]
-
-           # CONDICIONAL: Si salió industrial pero ya hay muchas, lo cambiamos
-            if tipo == "industrial":
-                if contador_industrias < limite_industrias:
-                    contador_industrias += 1
-                else:
-                    tipo = "residencial"
-            
-            edif = Edificio(x, y, edificio_w, edificio_h, tipo)
-            edificios.append(edif)
-            count += 1
-    
-    return edificios
+    def promedio_demanda(self) -> float:
+        return float(self.demanda.mean()) if len(self.demanda) else 0.0
+
+# ============================================================
+# GENERADOR POR CONTADOR (Philox4x32-10)
+# ============================================================
+# Cada hora absoluta tiene sus propios números: bloque Philox(clave=semilla, contador=hora).
+# Cualquier rango de horas se genera igual por separado, en serie o en varios procesos.
+PHILOX_M = (0xD2511F53, 0xCD9E8D57)  # Multiplicadores de las rondas
+PHILOX_W = (0x9E3779B9, 0xBB67AE85)  # Incremento de la clave entre rondas
+PHILOX_RONDAS = 10
+MASCARA_32 = np.uint64(0xFFFFFFFF)
+FLUJO_CLIMA = 0      # Temperatura base y ruido
+FLUJO_TORMENTAS = 1  # Inicio, duración y multiplicador de tormentas
+
+def philox4x32(contador: np.ndarray, clave: Tuple[int, int]) -> np.ndarray:
+    """Philox4x32-10 vectorizado: contador (4, n) de palabras de 32 bits -> (4, n) palabras aleatorias"""
+    c0, c1, c2, c3 = (np.asarray(palabra, dtype=np.uint64) for palabra in contador)
+    m0, m1, corrimiento = np.uint64(PHILOX_M[0]), np.uint64(PHILOX_M[1]), np.uint64(32)
+    for k0, k1 in _claves_rondas(int(clave[0]), int(clave[1])):
+        p0 = c0 * m0  # Producto de 32x32 bits: cabe entero en 64
+        p1 = c2 * m1
+        c0, c1, c2, c3 = ((p1 >> corrimiento) ^ c1 ^ k0, p1 & MASCARA_32,
+                          (p0 >> corrimiento) ^ c3 ^ k1, p0 & MASCARA_32)
+    return np.stack((c0, c1, c2, c3))
+
+@functools.lru_cache(maxsize=64)
+def _claves_rondas(k0: int, k1: int) -> Tuple[Tuple[np.uint64, np.uint64], ...]:
+    """Clave de cada ronda (se suma PHILOX_W entre rondas, módulo 2**32)"""
+    return tuple((np.uint64((k0 + r * PHILOX_W[0]) & 0xFFFFFFFF), np.uint64((k1 + r * PHILOX_W[1]) & 0xFFFFFFFF))
+                 for r in range(PHILOX_RONDAS))
+
+def _uniforme53(alto: np.ndarray, bajo: np.ndarray) -> np.ndarray:
+    """Uniforme en [0, 1) con 53 bits a partir de dos palabras de 32 (como NumPy)"""
+    return ((alto >> np.uint64(5)) * 67108864.0 + (bajo >> np.uint64(6))) / 9007199254740992.0
+
+def _duraciones_tormenta(palabra: np.ndarray) -> np.ndarray:
+    """Duración entera en DURACION_TORMENTA (extremos incluidos) a partir de una palabra de 32 bits"""
+    opciones = np.uint64(DURACION_TORMENTA[1] - DURACION_TORMENTA[0] + 1)
+    return DURACION_TORMENTA[0] + ((palabra * opciones) >> np.uint64(32)).astype(np.int64)
+
+def _multiplicador_tormenta(palabra: np.ndarray) -> np.ndarray:
+    """Multiplicador uniforme en FACTOR_TORMENTA a partir de una palabra de 32 bits"""
+    return FACTOR_TORMENTA[0] + (FACTOR_TORMENTA[1] - FACTOR_TORMENTA[0]) * (palabra + 0.5) / 4294967296.0
+
+def _sorteos_tormenta(t: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Sorteo de inicio, duración y multiplicador de cada hora (palabras del flujo de tormentas)"""
+    return _uniforme53(t[0], t[1]), _duraciones_tormenta(t[2]), _multiplicador_tormenta(t[3])
+
+def _temperatura_clima(tiempo: np.ndarray, w: np.ndarray) -> np.ndarray:
+    """Temperatura de cada hora a partir de las palabras del flujo de clima"""
+    dia = (tiempo // 24) % 365
+    hora = tiempo % 24
+    rango = RANGOS_TEMP_ESTACION[np.minimum(dia // 90, 3)]
+    temperatura = rango[:, 0] + (rango[:, 1] - rango[:, 0]) * _uniforme53(w[0], w[1])
+    temperatura += TABLA_VARIACION_TEMP[hora] + _uniforme53(w[2], w[3]) - 0.5
+    np.clip(temperatura, *RANGO_TEMP, out=temperatura)
+    return temperatura
+
+class ClimaContador:
+    """
+    Sorteos de clima y tormentas de acceso aleatorio: la hora t se calcula sin generar
+    las anteriores. Se usa en lugar de un np.random.Generator en sortear_clima.
+    """
+    def __init__(self, semilla: int = None):
+        self.semilla = semilla
+        # SeedSequence reparte cualquier semilla (o entropía del sistema) en la clave de 64 bits
+        self.clave = tuple(int(p) for p in np.random.SeedSequence(semilla).generate_state(2, np.uint32))
+    
+    def palabras(self, tiempo: np.ndarray, flujos: Tuple[int, ...]) -> np.ndarray:
+        """Bloque Philox de cada hora absoluta en cada flujo -> (flujos, 4, n), en una sola pasada"""
+        n = len(tiempo)
+        tiempo = np.tile(np.asarray(tiempo, dtype=np.uint64), len(flujos))
+        flujo = np.repeat(np.asarray(flujos, dtype=np.uint64), n)
+        contador = (tiempo & MASCARA_32, tiempo >> np.uint64(32), flujo, np.zeros_like(tiempo))
+        return philox4x32(contador, self.clave).reshape(4, len(flujos), -1).swapaxes(0, 1)
+    
+    def clima(self, tiempo: np.ndarray) -> Tuple[np.ndarray, ...]:
+        """Mismos sorteos (y distribuciones) que sortear_clima, pero función pura de la hora"""
+        w, t = self.palabras(tiempo, (FLUJO_CLIMA, FLUJO_TORMENTAS))
+        return (_temperatura_clima(tiempo, w),) + _sorteos_tormenta(t)
+    
+    def temperatura(self, tiempo: np.ndarray) -> np.ndarray:
+        """Solo la temperatura de clima(): no genera el flujo de tormentas"""
+        w, = self.palabras(tiempo, (FLUJO_CLIMA,))
+        return _temperatura_clima(tiempo, w)
+    
+    def calendario_tormentas(self, tiempo_inicio: int, tiempo_fin: int, probabilidad: float,
+                             estado: EstadoTormentas = None) -> np.ndarray:
+        """
+        Horas en tormenta de [inicio, fin) de una proyección que empieza en `tiempo_inicio`.
+        Es la única parte secuencial (una tormenta a la vez, MAX_TORMENTAS por año), y solo
+        recorre los sorteos de inicio, no el clima.
+        """
+        return self._tormentas(tiempo_inicio, tiempo_fin, probabilidad, estado, False)[0]
+    
+    def tormentas(self, tiempo_inicio: int, tiempo_fin: int, probabilidad: float,
+                  estado: EstadoTormentas = None) -> Tuple[np.ndarray, np.ndarray]:
+        """calendario_tormentas y el multiplicador de cada hora, de las mismas palabras del flujo de tormentas"""
+        return self._tormentas(tiempo_inicio, tiempo_fin, probabilidad, estado, True)
+    
+    def _tormentas(self, tiempo_inicio: int, tiempo_fin: int, probabilidad: float,
+                   estado: EstadoTormentas, con_multiplicador: bool) -> Tuple[np.ndarray, np.ndarray]:
+        if estado is None:
+            estado = EstadoTormentas()
+        partes, multiplicadores = [], []
+        while tiempo_inicio < tiempo_fin:
+            fin_anio = (tiempo_inicio // HORAS_ANIO + 1) * HORAS_ANIO
+            fin = min(tiempo_fin, fin_anio)
+            w, = self.palabras(np.arange(tiempo_inicio, fin), (FLUJO_TORMENTAS,))
+            partes.append(programar_tormentas(_uniforme53(w[0], w[1]), probabilidad,
+                                              _duraciones_tormenta(w[2]), estado=estado))
+            if con_multiplicador:
+                multiplicadores.append(_multiplicador_tormenta(w[3]))
+            if fin == fin_anio:
+                estado.generadas = 0  # El límite de tormentas es anual
+            tiempo_inicio = fin
+        if not partes:
+            return np.zeros(0, dtype=bool), np.zeros(0)
+        return np.concatenate(partes), (np.concatenate(multiplicadores) if con_multiplicador else None)
+    
+    def estado_tormentas(self, tiempo_inicio: int, tiempo: int, probabilidad: float) -> EstadoTormentas:
+        """Estado de tormentas al llegar a la hora `tiempo` de una proyección que empezó en `tiempo_inicio`"""
+        estado = EstadoTormentas()
+        self.calendario_tormentas(tiempo_inicio, tiempo, probabilidad, estado)
+        return estado
+
+def sortear_clima(tiempo: np.ndarray, rng: np.random.Generator) -> Tuple[np.ndarray, ...]:
+    """
+    Sorteos por hora: temperatura, inicio y duración de tormentas y su multiplicador.
+    No dependen de la probabilidad de tormenta (números aleatorios comunes).
+    Con un ClimaContador cada hora sale de su propio contador y no del orden de los sorteos.
+    """
+    if isinstance(rng, ClimaContador):
+        return rng.clima(tiempo)
+    n = len(tiempo)
+    dia = (tiempo // 24) % 365
+    hora = tiempo % 24
+    
+    # --- CLIMA ---
+    rango = RANGOS_TEMP_ESTACION[np.minimum(dia // 90, 3)]
+    temperatura = rng.uniform(rango[:, 0], rango[:, 1]) + TABLA_VARIACION_TEMP[hora]
+    temperatura += rng.uniform(-0.5, 0.5, n)
+    np.clip(temperatura, *RANGO_TEMP, out=temperatura)
+    
+    # --- TORMENTAS ---
+    sorteo = rng.random(n)
+    duraciones = rng.integers(DURACION_TORMENTA[0], DURACION_TORMENTA[1] + 1, n)  # Dura 2-6 horas
+    multiplicador = rng.uniform(*FACTOR_TORMENTA, n)
+    return temperatura, sorteo, duraciones, multiplicador
+
+def generar_bloque_demanda(ciudad: CiudadArrays, tiempo_inicio: int, tiempo_fin: int,
+                           probabilidad_tormenta: float, rng: np.random.Generator,
+                           estado: EstadoTormentas) -> TrazaDemanda:
+    """Clima, tormentas y demanda de las horas [inicio, fin) en expresiones de arrays"""
+    tiempo = np.arange(tiempo_inicio, max(tiempo_inicio, tiempo_fin))
+    return demanda_desde_sorteos(ciudad, tiempo_inicio, sortear_clima(tiempo, rng),
+                                 probabilidad_tormenta, estado)
+
+def demanda_desde_sorteos(ciudad: CiudadArrays, tiempo_inicio: int, sorteos: Tuple[np.ndarray, ...],
+                          probabilidad_tormenta: float, estado: EstadoTormentas) -> TrazaDemanda:
+    """Tormentas y demanda a partir de sorteos ya hechos (los de sortear_clima desde tiempo_inicio)"""
+    temperatura, sorteo, duraciones, multiplicador = sorteos
+    en_tormenta = programar_tormentas(sorteo, probabilidad_tormenta, duraciones, estado=estado)
+    return traza_con_tormentas(ciudad.demanda_base_hora, tiempo_inicio, temperatura, multiplicador, en_tormenta)
+
+def traza_con_tormentas(demanda_base_hora: np.ndarray, tiempo_inicio: int, temperatura: np.ndarray,
+                        multiplicador: np.ndarray, en_tormenta: np.ndarray) -> TrazaDemanda:
+    """Demanda horaria con el calendario de tormentas ya resuelto"""
+    tiempo = np.arange(tiempo_inicio, tiempo_inicio + len(temperatura))
+    factor_tormenta = np.where(en_tormenta, multiplicador, 1.0)
+    
+    # --- CONSUMO ---
+    demanda = demanda_base_hora[tiempo % 24] * factor_temperatura(temperatura) * factor_tormenta
+    return TrazaDemanda(tiempo_inicio, demanda, temperatura)
+
+def simular_traza_vectorizada(edificios: List[Edificio], dia_inicio: int = 0, hora_inicio: int = 0,
+                              probabilidad_tormenta: float = 0.0, semilla: int = None) -> TrazaDemanda:
+    """Genera el resto del año (clima, tormentas y demanda) en expresiones de arrays"""
+    return generar_bloque_demanda(arrays_ciudad(edificios), dia_inicio * 24 + hora_inicio, HORAS_ANIO,
+                                  probabilidad_tormenta, ClimaContador(semilla), EstadoTormentas())
+
+def generar_tramo_demanda(ciudad: CiudadArrays, tiempo_inicio: int, desde: int, hasta: int,
+                          probabilidad_tormenta: float, semilla: int) -> TrazaDemanda:
+    """
+    Horas [desde, hasta) de la proyección sembrada que empieza en `tiempo_inicio`, sin generar
+    las anteriores: coincide exactamente con el mismo tramo de simular_traza_vectorizada.
+    """
+    clima = ClimaContador(semilla)
+    estado = clima.estado_tormentas(tiempo_inicio, desde, probabilidad_tormenta)
+    return generar_bloque_demanda(ciudad, desde, hasta, probabilidad_tormenta, clima, estado)
 
 # ============================================================
 # SIMULADOR ANUAL
 # ============================================================
+def calcular_metricas_subestacion(tipo: str, datos: Dict, blackouts: int, promedio_demanda: float) -> Dict:
+    """Costos, eficiencia y confiabilidad de una subestación dados sus blackouts"""
+    # Costo operativo: 365 días × 24 horas × costo/hora
+    costo_operativo = 365 * 24 * datos["costo_operativo_hora"]
+    costo_total = datos["costo_inversion"] + costo_operativo
+    
+    # Eficiencia: promedio de uso de capacidad
+    capacidad = datos["capacidad_kw"]
+    eficiencia = (promedio_demanda / capacidad) * 100
+    
+    # Calcular confiabilidad
+    horas_totales = 365 * 24
+    confiabilidad = max(0, 1 - (blackouts / horas_totales)) * 100
+    
+    # Puntaje de optimización (mayor es mejor)
+    puntaje_optimo = (confiabilidad * 10) - (costo_total / 1000)
+    
+    return {
+        "tipo": tipo,
+        "costo_total": round(costo_total, 2),
+        "blackouts": blackouts,
+        "eficiencia": round(eficiencia, 1),
+        "confiabilidad": round(confiabilidad, 1),
+        "promedio_demanda_kw": round(promedio_demanda, 0),
+        "puntaje_optimo": round(puntaje_optimo, 1),
+        "capacidad_mw": datos.get("capacidad_mw", capacidad / 1000)
+    }
+
+def dtype_historial(dtype=np.float64) -> np.dtype:
+    """Registro muestreado cada 6 horas: (dia, hora, demanda, temperatura)"""
+    return np.dtype([("dia", np.int32), ("hora", np.int8), ("demanda", dtype), ("temperatura", dtype)])
+
 class ResultadoAnual:
-    def __init__(self, tipo_subestacion: str):
+    def __init__(self, tipo_subestacion: str, datos: Dict = None, dtype=np.float64):
         self.tipo = tipo_subestacion
-        self.datos = SUBESTACIONES[tipo_subestacion]
-        self.historial_demanda = []  # Lista de (dia, hora, demanda, temperatura)
-        self.historial_horas = []    # Historial por hora para gráfico
+        self.datos = SUBESTACIONES[tipo_subestacion] if datos is None else datos
+        self.dtype = np.dtype(dtype)  # float64 o float32 para ahorrar memoria
+        self.historial_demanda = np.empty(0, dtype=dtype_historial(self.dtype))  # (dia, hora, demanda, temperatura)
+        self.historial_horas = np.empty(0, dtype=self.dtype)  # Demanda hora a hora (buffer contiguo)
+        self.tiempo_inicio = 0       # Hora absoluta de historial_horas[0]
         self.blackouts = 0           # Contador de horas sin luz
         self.dias_totales = 365
         self.costo_total = 0
+        self._curva = None           # Curva de duración de carga (se recalcula si hace falta)
+    
+    @property
+    def curva_duracion(self) -> CurvaDuracionCarga:
+        """Curva de duración de carga de la proyección"""
+        if self._curva is None:
+            self._curva = CurvaDuracionCarga(self.historial_horas)
+        return self._curva
+    
+    def __getstate__(self):
+        # La curva es derivable del historial: no se envía entre procesos
+        estado = self.__dict__.copy()
+        estado["_curva"] = None
+        return estado
+    
+    def registrar_traza(self, traza: TrazaDemanda):
+        """Carga una traza completa de demanda (blackouts e historiales)"""
+        self.tiempo_inicio = traza.tiempo_inicio
+        self.historial_horas = traza.demanda.astype(self.dtype, copy=False)
+        if self.historial_horas is traza.demanda:
+            self._curva = traza.curva_duracion()
+        else:
+            self._curva = None
+        self.blackouts = self.curva_duracion.horas_sobre(self.datos["capacidad_kw"])
+        
+        muestras = np.flatnonzero(traza.hora % 6 == 0)
+        historial = np.empty(len(muestras), dtype=dtype_historial(self.dtype))
+        historial["dia"] = traza.dia[muestras]
+        historial["hora"] = traza.hora[muestras]
+        historial["demanda"] = traza.demanda[muestras]
+        historial["temperatura"] = traza.temperatura[muestras]
+        self.historial_demanda = historial
+    
+    @classmethod
+    def unir(cls, partes: List["ResultadoAnual"]) -> "ResultadoAnual":
+        """Resultado de tramos consecutivos de la misma proyección (en orden de tiempo)"""
+        primero = partes[0]
+        resultado = cls(primero.tipo, primero.datos, primero.dtype)
+        resultado.tiempo_inicio = primero.tiempo_inicio
+        resultado.historial_horas = np.concatenate([p.historial_horas for p in partes])
+        resultado.historial_demanda = np.concatenate([p.historial_demanda for p in partes])
+        resultado.blackouts = sum(int(p.blackouts) for p in partes)
+        return resultado
         
     def calcular_metricas(self) -> Dict:
         """Calcula costos y eficiencia al final del año"""
-        # Costo operativo: 365 días × 24 horas × costo/hora
-        costo_operativo = 365 * 24 * self.datos["costo_operativo_hora"]
-        self.costo_total = self.datos["costo_inversion"] + costo_operativo
-        
-        # Eficiencia: promedio de uso de capacidad
-        capacidad = self.datos["capacidad_kw"]
         if len(self.historial_horas) > 0:
-            promedio_demanda = sum(self.historial_horas) / len(self.historial_horas)
-            eficiencia = (promedio_demanda / capacidad) * 100
+            promedio_demanda = float(self.historial_horas.mean(dtype=np.float64))
         else:
             promedio_demanda = 0
-            eficiencia = 0
+        metricas = calcular_metricas_subestacion(self.tipo, self.datos, self.blackouts, promedio_demanda)
+        self.costo_total = metricas["costo_total"]
+        return metricas
+
+def _proceso_horario(ciudad: CiudadArrays, tiempo_inicio: int, probabilidad_tormenta: float, rnd):
+    """Lógica hora a hora del motor 'bucle': produce (demanda, temperatura) por hora"""
+    horas_totales = HORAS_ANIO - tiempo_inicio
+    
+    # Iterar hora por hora desde el momento actual
+    tiempo_actual = tiempo_inicio
+    
+    # Estado de tormenta
+    tiempo_tormenta_restante = 0
+    tormentas_generadas = 0
+    
+    # Tablas como listas de Python: indexar escalares NumPy hora a hora es lento
+    rangos_estacion = RANGOS_TEMP_ESTACION.tolist()
+    variacion_hora = TABLA_VARIACION_TEMP.tolist()
+    demanda_base_hora = ciudad.demanda_base_hora.tolist()
+    
+    for _ in range(int(horas_totales)):
+        dia_actual = tiempo_actual // 24
+        hora_dia = tiempo_actual % 24
         
-        # Calcular confiabilidad
-        horas_totales = 365 * 24
-        confiabilidad = max(0, 1 - (self.blackouts / horas_totales)) * 100
+        # --- CLIMA ---
+        # (Lógica de estaciones igual que antes)
+        temp_min, temp_max = rangos_estacion[min(dia_actual // 90, 3)]
+        temp_base = rnd.uniform(temp_min, temp_max)
         
-        # Puntaje de optimización (mayor es mejor)
-        puntaje_optimo = (confiabilidad * 10) - (self.costo_total / 1000)
+        # Variación horaria
+        temperatura_hora = temp_base + variacion_hora[hora_dia]
         
-        return {
-            "tipo": self.tipo,
-            "costo_total": round(self.costo_total, 2),
-            "blackouts": self.blackouts,
-            "eficiencia": round(eficiencia, 1),
-            "confiabilidad": round(confiabilidad, 1),
-            "promedio_demanda_kw": round(promedio_demanda, 0),
-            "puntaje_optimo": round(puntaje_optimo, 1),
-            "capacidad_mw": self.datos["capacidad_mw"]
-        }
+        temperatura_hora += rnd.uniform(-0.5, 0.5)
+        temperatura_hora = max(RANGO_TEMP[0], min(RANGO_TEMP[1], temperatura_hora))
+        
+        # --- TORMENTAS ---
+        # Decidir si inicia tormenta (solo si no hay una activa y no pasamos el límite)
+        factor_tormenta = 1.0
+        if tiempo_tormenta_restante > 0:
+            tiempo_tormenta_restante -= 1
+            factor_tormenta = rnd.uniform(*FACTOR_TORMENTA) # Caos
+        else:
+            # Probabilidad por hora de iniciar tormenta
+            if tormentas_generadas < MAX_TORMENTAS and rnd.random() < probabilidad_tormenta:
+                tiempo_tormenta_restante = rnd.randint(*DURACION_TORMENTA) # Dura 2-6 horas
+                tormentas_generadas += 1
+        
+        # --- CONSUMO ---
+        consumo_total = demanda_base_hora[hora_dia] * factor_temperatura(temperatura_hora)
+        
+        # Aplicar Tormenta
+        consumo_total *= factor_tormenta
+        
+        yield consumo_total, temperatura_hora
+        tiempo_actual += 1
+
+def _traza_desde_horas(tiempo_inicio: int, horas: List[Tuple[float, float]]) -> TrazaDemanda:
+    datos = np.array(horas, dtype=np.float64).reshape(-1, 2)
+    return TrazaDemanda(tiempo_inicio, datos[:, 0].copy(), datos[:, 1].copy())
+
+def simular_traza_simpy(edificios: List[Edificio], dia_inicio: int = 0, hora_inicio: int = 0,
+                        probabilidad_tormenta: float = 0.0, semilla: int = None) -> TrazaDemanda:
+    """
+    Simulación por eventos discretos: SimPy solo despierta cuando cambia el estado
+    (inicio/fin de tormenta o cambio de estación). Las tormentas llegan con tiempos
+    entre llegadas geométricos, equivalentes a sortear probabilidad_tormenta cada hora.
+    Entre dos eventos la demanda del tramo se evalúa con una expresión de arrays
+    (la temperatura se sortea por hora), y cada tramo aporta su duración a la traza.
+    """
+    ciudad = arrays_ciudad(edificios)
+    rng = np.random.default_rng(semilla)
+    
+    tiempo_inicio = dia_inicio * 24 + hora_inicio
+    env = simpy.Environment(initial_time=tiempo_inicio)
+    tramos = []
+    estado = {"inicio": tiempo_inicio, "estacion": min(dia_inicio // 90, 3), "tormenta": False}
+    
+    def cerrar_tramo():
+        """Evalúa la demanda del tramo [inicio, ahora) con el estado vigente"""
+        inicio, fin = estado["inicio"], int(env.now)
+        duracion = fin - inicio
+        if duracion <= 0:
+            return
+        hora = np.arange(inicio, fin) % 24
+        temp_min, temp_max = RANGOS_TEMP_ESTACION[estado["estacion"]]
+        temperatura = rng.uniform(temp_min, temp_max, duracion) + TABLA_VARIACION_TEMP[hora]
+        temperatura += rng.uniform(-0.5, 0.5, duracion)
+        np.clip(temperatura, *RANGO_TEMP, out=temperatura)
+        factor_tormenta = rng.uniform(*FACTOR_TORMENTA, duracion) if estado["tormenta"] else 1.0
+        demanda = ciudad.demanda_base_hora[hora] * factor_temperatura(temperatura) * factor_tormenta
+        tramos.append((demanda, temperatura))
+        estado["inicio"] = fin
+    
+    def proceso_estaciones():
+        for dia_cambio in (90, 180, 270):
+            if dia_cambio * 24 > env.now:
+                yield env.timeout(dia_cambio * 24 - env.now)
+                cerrar_tramo()
+                estado["estacion"] = dia_cambio // 90
+    
+    def proceso_tormentas():
+        for _ in range(MAX_TORMENTAS):
+            # Horas hasta la próxima hora en que se sortea con éxito (1 = la actual)
+            espera = int(rng.geometric(probabilidad_tormenta))
+            yield env.timeout(espera - 1)
+            # La tormenta se decide en esta hora y afecta las 2-6 horas siguientes
+            yield env.timeout(1)
+            cerrar_tramo()
+            estado["tormenta"] = True
+            yield env.timeout(int(rng.integers(DURACION_TORMENTA[0], DURACION_TORMENTA[1] + 1)))
+            cerrar_tramo()
+            estado["tormenta"] = False
+    
+    env.process(proceso_estaciones())
+    if probabilidad_tormenta > 0:
+        env.process(proceso_tormentas())
+    if tiempo_inicio < HORAS_ANIO:
+        env.run(until=HORAS_ANIO)
+        cerrar_tramo()
+    
+    if not tramos:
+        return TrazaDemanda(tiempo_inicio, np.empty(0), np.empty(0))
+    return TrazaDemanda(tiempo_inicio, np.concatenate([d for d, _ in tramos]),
+                        np.concatenate([t for _, t in tramos]))
+
+def simular_traza_bucle(edificios: List[Edificio], dia_inicio: int = 0, hora_inicio: int = 0,
+                        probabilidad_tormenta: float = 0.0, semilla: int = None) -> TrazaDemanda:
+    """
+    Lógica horaria original en un bucle simple (sin SimPy).
+    Un proceso que avanza de a una hora no necesita planificador de eventos.
+    """
+    ciudad = arrays_ciudad(edificios)
+    rnd = random.Random(semilla) if semilla is not None else random
+    
+    tiempo_inicio = dia_inicio * 24 + hora_inicio
+    horas = list(_proceso_horario(ciudad, tiempo_inicio, probabilidad_tormenta, rnd))
+    return _traza_desde_horas(tiempo_inicio, horas)
+
+def simular_traza_paralela(edificios: List[Edificio], dia_inicio: int = 0, hora_inicio: int = 0,
+                           probabilidad_tormenta: float = 0.0, semilla: int = None) -> TrazaDemanda:
+    """Motor vectorizado repartido por tramos en un pool de procesos (ver paralelo.py)"""
+    import paralelo  # Importación diferida: paralelo.py depende de este módulo
+    return paralelo.simular_traza_paralela(edificios, dia_inicio, hora_inicio, probabilidad_tormenta, semilla)
+
+# Motores disponibles: generan la traza de demanda del resto del año
+MOTORES_SIMULACION = {
+    "vectorizado": simular_traza_vectorizada,
+    "bucle": simular_traza_bucle,
+    "simpy": simular_traza_simpy,
+    "paralelo": simular_traza_paralela,
+}
+
+def simular_traza(edificios: List[Edificio], dia_inicio: int = 0, hora_inicio: int = 0,
+                  probabilidad_tormenta: float = 0.0,
+                  motor: str = "vectorizado", semilla: int = None) -> TrazaDemanda:
+    """Simula la demanda hasta fin de año con el motor indicado"""
+    if motor not in MOTORES_SIMULACION:
+        raise ValueError(f"Motor de simulación desconocido: {motor}")
+    return MOTORES_SIMULACION[motor](edificios, dia_inicio, hora_inicio, probabilidad_tormenta, semilla)
 
 def simular_anio(tipo_subestacion: str, edificios: List[Edificio], 
                  dia_inicio: int = 0, hora_inicio: int = 0, 
-                 probabilidad_tormenta: float = 0.0) -> ResultadoAnual:
+                 probabilidad_tormenta: float = 0.0,
+                 motor: str = "vectorizado", semilla: int = None,
+                 dtype=np.float64, proyeccion: "ProyeccionIncremental" = None,
+                 datos: Dict = None) -> ResultadoAnual:
     """
     Simula desde el momento actual hasta fin de año (365 días).
     Incluye probabilidad de tormentas.
+    motor="vectorizado" genera todo el año con arrays; motor="bucle" avanza hora a hora
+    en un bucle simple y motor="simpy" procesa solo los eventos (tormentas, estaciones).
+    motor="paralelo" reparte el horizonte por meses en procesos y une los resultados parciales.
+    Con `proyeccion` se reutiliza su año sembrado en vez de simular de nuevo.
+    `datos` permite subestaciones fuera de SUBESTACIONES (catálogos propios).
     """
-    resultado = ResultadoAnual(tipo_subestacion)
-    capacidad_max = resultado.datos["capacidad_kw"]
-    
     print(f"Simulando {tipo_subestacion} desde Día {dia_inicio}...")
     
-    env = simpy.Environment()
+    if motor == "paralelo" and proyeccion is None:
+        import paralelo
+        return paralelo.simular_anio_paralelo(tipo_subestacion, edificios, dia_inicio, hora_inicio,
+                                              probabilidad_tormenta, semilla, dtype, datos=datos)
+    if proyeccion is not None:
+        traza = proyeccion.traza(dia_inicio, hora_inicio, probabilidad_tormenta)
+    else:
+        traza = simular_traza(edificios, dia_inicio, hora_inicio, probabilidad_tormenta, motor, semilla)
+    resultado = ResultadoAnual(tipo_subestacion, datos, dtype=dtype)
+    resultado.registrar_traza(traza)
+    return resultado
+
+# ============================================================
+# PROYECCIÓN INCREMENTAL (Año sembrado + agregados por día)
+# ============================================================
+class ProyeccionIncremental:
+    """
+    Sortea el año completo una sola vez (hora absoluta -> clima y tormentas) y guarda
+    agregados por día de la demanda sin tormentas. Proyectar desde (día, hora) reutiliza
+    los días completos restantes y solo recalcula el primer día parcial y las horas de tormenta.
+    """
+    def __init__(self, edificios: List[Edificio], semilla: int = None):
+        self.ciudad = arrays_ciudad(edificios)
+        self.semilla = semilla
+        tiempo = np.arange(HORAS_ANIO)
+        self.temperatura, self.sorteo, self.duraciones, self.multiplicador = \
+            sortear_clima(tiempo, ClimaContador(semilla))
+        self.demanda_base = self.ciudad.demanda_base_hora[tiempo % 24] * factor_temperatura(self.temperatura)
+        
+        # Sufijos por día: [d] = suma de los días d..364 (la posición 365 vale 0)
+        self._por_dia = self.demanda_base.reshape(365, 24)
+        self.sufijo_demanda = self._sufijo(self._por_dia.sum(axis=1))
+        self._sufijo_blackouts = {}  # capacidad_kw -> sufijo de horas sobre la capacidad
     
-    # Límite duro de tormentas anuales (60 máx)
-    MAX_TORMENTAS = 60
-    tormentas_generadas = 0
+    @staticmethod
+    def _sufijo(por_dia: np.ndarray) -> np.ndarray:
+        return np.r_[np.cumsum(por_dia[::-1])[::-1], 0]
     
-    def proceso_simulacion():
-        nonlocal tormentas_generadas
-        horas_totales = (365 * 24) - (dia_inicio * 24 + hora_inicio)
-        
-        # Iterar hora por hora desde el momento actual
-        tiempo_actual = dia_inicio * 24 + hora_inicio
+    def sufijo_blackouts(self, capacidad_kw: float) -> np.ndarray:
+        """Blackouts sin tormentas de los días d..364 (se calcula una vez por capacidad)"""
+        sufijo = self._sufijo_blackouts.get(capacidad_kw)
+        if sufijo is None:
+            sufijo = self._sufijo((self._por_dia > capacidad_kw).sum(axis=1))
+            self._sufijo_blackouts[capacidad_kw] = sufijo
+        return sufijo
+    
+    def horas_tormenta(self, tiempo_inicio: int, probabilidad_tormenta: float) -> np.ndarray:
+        """Horas absolutas afectadas por tormentas desde `tiempo_inicio`"""
+        mascara = programar_tormentas(self.sorteo[tiempo_inicio:], probabilidad_tormenta,
+                                      self.duraciones[tiempo_inicio:])
+        return np.flatnonzero(mascara) + tiempo_inicio
+    
+    def agregados(self, dia_inicio: int, hora_inicio: int, probabilidad_tormenta: float,
+                  capacidades) -> Tuple[np.ndarray, float, int]:
+        """(blackouts por capacidad, demanda promedio, horas) de la proyección hasta fin de año"""
+        capacidades = np.atleast_1d(np.asarray(capacidades, dtype=np.float64))
+        tiempo_inicio = min(dia_inicio * 24 + hora_inicio, HORAS_ANIO)
+        horas = HORAS_ANIO - tiempo_inicio
+        if horas <= 0:
+            return np.zeros(len(capacidades), dtype=np.int64), 0.0, 0
         
-        # Estado de tormenta
-        tiempo_tormenta_restante = 0
+        # Primer día parcial + días completos restantes (sufijos)
+        primer_dia_completo = -(-tiempo_inicio // 24)
+        parcial = self.demanda_base[tiempo_inicio:primer_dia_completo * 24]
+        suma = float(parcial.sum()) + self.sufijo_demanda[primer_dia_completo]
+        blackouts = np.array([int((parcial > cap).sum()) + int(self.sufijo_blackouts(cap)[primer_dia_completo])
+                              for cap in capacidades.tolist()], dtype=np.int64)
         
-        for _ in range(int(horas_totales)):
-            dia_actual = tiempo_actual // 24
-            hora_dia = tiempo_actual % 24
-            
-            # --- CLIMA ---
-            # (Lógica de estaciones igual que antes)
-            if dia_actual < 90:  # Verano
-                temp_base = random.uniform(28, 35)
-            elif dia_actual < 180:  # Otoño
-                temp_base = random.uniform(22, 28)
-            elif dia_actual < 270:  # Invierno
-                temp_base = random.uniform(18, 25)
-            else:  # Primavera
-                temp_base = random.uniform(20, 30)
-            
-            # Variación horaria
-            if 6 <= hora_dia <= 14:
-                temperatura_hora = temp_base + (hora_dia - 6) * 0.8
-            elif 14 < hora_dia <= 20:
-                temperatura_hora = temp_base + (20 - hora_dia) * 0.4
-            else:
-                temperatura_hora = temp_base - 2
-            
-            temperatura_hora += random.uniform(-0.5, 0.5)
-            temperatura_hora = max(18.0, min(35.0, temperatura_hora))
-            
-            # --- TORMENTAS ---
-            # Decidir si inicia tormenta (solo si no hay una activa y no pasamos el límite)
-            factor_tormenta = 1.0
-            if tiempo_tormenta_restante > 0:
-                tiempo_tormenta_restante -= 1
-                factor_tormenta = random.uniform(1.5, 2.5) # Caos
-            else:
-                # Probabilidad por hora de iniciar tormenta
-                if tormentas_generadas < MAX_TORMENTAS and random.random() < probabilidad_tormenta:
-                    tiempo_tormenta_restante = random.randint(2, 6) # Dura 2-6 horas
-                    tormentas_generadas += 1
-            
-            # --- CONSUMO ---
-            consumo_total = 0
-            for edif in edificios:
-                consumo = edif.calcular_consumo(hora_dia, temperatura_hora)
-                consumo_total += consumo
-            
-            # Aplicar Tormenta
-            consumo_total *= factor_tormenta
-            
-            # Verificar blackout
-            if consumo_total > capacidad_max:
-                resultado.blackouts += 1
-            
-            # Guardar datos
-            resultado.historial_horas.append(consumo_total)
-            if hora_dia % 6 == 0:
-                resultado.historial_demanda.append((dia_actual, hora_dia, consumo_total, temperatura_hora))
-            
-            tiempo_actual += 1
-            yield env.timeout(1)
+        # Corrección en las horas de tormenta (la demanda base se multiplica)
+        idx = self.horas_tormenta(tiempo_inicio, probabilidad_tormenta)
+        if len(idx):
+            base = self.demanda_base[idx]
+            tormenta = base * self.multiplicador[idx]
+            suma += float((tormenta - base).sum())
+            blackouts += ((tormenta[:, None] > capacidades).sum(axis=0)
+                          - (base[:, None] > capacidades).sum(axis=0))
+        return blackouts, suma / horas, horas
     
-    env.process(proceso_simulacion())
-    env.run()
+    def _tramo(self, inicio: int, fin: int, horas_tormenta: np.ndarray) -> TrazaDemanda:
+        """Horas [inicio, fin): demanda base y solo las horas de tormenta que caen dentro"""
+        demanda = self.demanda_base[inicio:fin].copy()
+        idx = horas_tormenta[np.searchsorted(horas_tormenta, inicio):np.searchsorted(horas_tormenta, fin)]
+        demanda[idx - inicio] *= self.multiplicador[idx]
+        return TrazaDemanda(inicio, demanda, self.temperatura[inicio:fin])
     
-    return resultado
+    def traza(self, dia_inicio: int, hora_inicio: int, probabilidad_tormenta: float) -> TrazaDemanda:
+        """Traza horaria completa de la proyección (para historiales y consumidores)"""
+        tiempo_inicio = min(dia_inicio * 24 + hora_inicio, HORAS_ANIO)
+        return self._tramo(tiempo_inicio, HORAS_ANIO, self.horas_tormenta(tiempo_inicio, probabilidad_tormenta))
+    
+    def iterar_bloques(self, dia_inicio: int, hora_inicio: int, probabilidad_tormenta: float,
+                       horas_bloque: int = 24 * 30):
+        """
+        La misma traza en bloques consecutivos de `horas_bloque` horas. Cada bloque se arma
+        al pedirlo (solo el calendario de tormentas se resuelve antes, y es secuencial).
+        """
+        tiempo_inicio = min(dia_inicio * 24 + hora_inicio, HORAS_ANIO)
+        horas_tormenta = self.horas_tormenta(tiempo_inicio, probabilidad_tormenta)
+        for inicio in range(tiempo_inicio, HORAS_ANIO, horas_bloque):
+            yield self._tramo(inicio, min(inicio + horas_bloque, HORAS_ANIO), horas_tormenta)
 
 # ============================================================
 # OPTIMIZADOR
 # ============================================================
-def encontrar_mejor_subestacion(edificios: List[Edificio], 
-                                dia_actual: int = 0, 
-                                hora_actual: int = 0,
-                                historial_fallos: Dict[str, int] = None,
-                                prob_tormenta: float = 0.0) -> Tuple[str, List[Dict]]:
+def evaluar_catalogo(traza: TrazaDemanda, catalogo: Dict[str, Dict] = None,
+                     historial_fallos: Dict[str, int] = None) -> List[Dict]:
     """
-    Determina la óptima considerando:
-    1. Costo Inversión + Operativo
-    2. Penalización por Blackouts (evita buscar perfección si es muy cara)
-    3. Historial de fallos REALES ya ocurridos
+    Evalúa cada subestación de un catálogo sobre una traza ya simulada.
+    Los blackouts salen de la curva de duración, sin volver a simular.
     """
+    if catalogo is None:
+        catalogo = SUBESTACIONES
     if historial_fallos is None:
-        historial_fallos = {"Pequeña": 0, "Mediana": 0, "Grande": 0}
+        historial_fallos = {}
+    
+    curva = traza.curva_duracion()
+    capacidades = np.array([datos["capacidad_kw"] for datos in catalogo.values()], dtype=np.float64)
+    return metricas_catalogo(curva.horas_sobre(capacidades).tolist(), traza.promedio_demanda(),
+                             catalogo, historial_fallos)
 
+def metricas_catalogo(blackouts_futuros: List[int], promedio_demanda: float,
+                      catalogo: Dict[str, Dict], historial_fallos: Dict[str, int]) -> List[Dict]:
+    """Métricas de cada subestación a partir de sus blackouts futuros y el historial real"""
     resultados = []
-    COSTO_HORA_BLACKOUT = 500  # Penalización económica por hora sin luz
-    
-    print(f"🏆 Iniciando comparación (Día {dia_actual}, Prob Tormenta: {prob_tormenta:.4f})...")
-    
-    for tipo in ["Pequeña", "Mediana", "Grande"]:
-        # Simular futuro
-        res = simular_anio(tipo, edificios, dia_actual, hora_actual, prob_tormenta)
+    for (tipo, datos), blackouts in zip(catalogo.items(), blackouts_futuros):
+        # Calcular métricas base
+        metricas = calcular_metricas_subestacion(tipo, datos, blackouts, promedio_demanda)
         
         # Combinar con pasado real
         fallos_pasados = historial_fallos.get(tipo, 0)
-        fallos_totales = fallos_pasados + res.blackouts
-        
-        # Calcular métricas base
-        metricas = res.calcular_metricas()
+        fallos_totales = fallos_pasados + blackouts
         
         # --- CÁLCULO DE COSTO AJUSTADO ---
         # Costo Real = Inversión + Operativo + (Multas por Blackout)
         costo_multas = fallos_totales * COSTO_HORA_BLACKOUT
-        costo_ajustado = metricas["costo_total"] + costo_multas
         
         # Actualizar métricas con datos combinados
         metricas["blackouts_totales"] = fallos_totales
-        metricas["blackouts_futuros"] = res.blackouts
+        metricas["blackouts_futuros"] = blackouts
         metricas["fallos_pasados"] = fallos_pasados
-        metricas["costo_ajustado"] = costo_ajustado
-        metricas["confiabilidad_real"] = max(0, 100 * (1 - (fallos_totales / (365*24))))
-        
+        metricas["costo_multas"] = costo_multas
+        metricas["costo_ajustado"] = metricas["costo_total"] + costo_multas
+        metricas["confiabilidad_real"] = confiabilidad_real(fallos_totales)
         resultados.append(metricas)
-        print(f"{tipo}: ${metricas['costo_total']:,.0f} + ${costo_multas:,.0f} (Multas) = ${costo_ajustado:,.0f}")
+    return resultados
 
-    # Criterio: Menor COSTO AJUSTADO
-    # Pero con una restricción mínima de seguridad (95% confiabilidad)
-    # 5% de 8760h = ~438 horas. Si falla más de eso, es inaceptable.
-    
-    candidatos_viables = [r for r in resultados if r["confiabilidad_real"] > 95.0]
+def elegir_ganadora(resultados: List[Dict]) -> Dict:
+    """
+    Criterio: Menor COSTO AJUSTADO
+    Pero con una restricción mínima de seguridad (95% confiabilidad)
+    5% de 8760h = ~438 horas. Si falla más de eso, es inaceptable.
+    """
+    candidatos_viables = [r for r in resultados if r["confiabilidad_real"] > CONFIABILIDAD_MINIMA]
     
     if candidatos_viables:
-        ganadora = min(candidatos_viables, key=lambda x: x["costo_ajustado"])
+        return min(candidatos_viables, key=lambda x: x["costo_ajustado"])
+    # Si todas son desastrosas, elegir la menos mala (mayor confiabilidad)
+    return max(resultados, key=lambda x: x["confiabilidad_real"])
+
+# ============================================================
+# COTAS ANALÍTICAS DE DEMANDA
+# ============================================================
+class CotasDemanda:
+    """
+    Demanda mínima y máxima posible de cada hora restante, sin simular:
+    rango de temperatura de la estación (+ variación horaria ± ruido, recortado a RANGO_TEMP)
+    y multiplicador de tormenta entre 1 y FACTOR_TORMENTA[1].
+    """
+    def __init__(self, edificios: List[Edificio], dia_inicio: int = 0, hora_inicio: int = 0,
+                 probabilidad_tormenta: float = 0.0):
+        ciudad = arrays_ciudad(edificios)
+        self.tiempo_inicio = min(dia_inicio * 24 + hora_inicio, HORAS_ANIO)
+        tiempo = np.arange(self.tiempo_inicio, HORAS_ANIO)
+        hora = tiempo % 24
+        rango = RANGOS_TEMP_ESTACION[np.minimum((tiempo // 24) // 90, 3)]
+        temp_baja = np.clip(rango[:, 0] + TABLA_VARIACION_TEMP[hora] - 0.5, *RANGO_TEMP)
+        temp_alta = np.clip(rango[:, 1] + TABLA_VARIACION_TEMP[hora] + 0.5, *RANGO_TEMP)
+        
+        # factor_temperatura es una V con mínimo en 22°C: el máximo está en un extremo
+        f_baja, f_alta = factor_temperatura(temp_baja), factor_temperatura(temp_alta)
+        f_max = np.maximum(f_baja, f_alta)
+        f_min = np.where((temp_baja <= 22) & (temp_alta >= 22), 1.0, np.minimum(f_baja, f_alta))
+        
+        base = ciudad.demanda_base_hora[hora]
+        self.temp_baja, self.temp_alta = temp_baja, temp_alta
+        self.minima = base * f_min               # Sin tormenta y con la temperatura más benigna
+        self.maxima_sin_tormenta = base * f_max
+        hay_tormentas = probabilidad_tormenta > 0
+        self.maxima = self.maxima_sin_tormenta * (FACTOR_TORMENTA[1] if hay_tormentas else 1.0)
+        # Horas de tormenta posibles como máximo (límite anual × duración máxima)
+        self.horas_tormenta_max = MAX_TORMENTAS * DURACION_TORMENTA[1] if hay_tormentas else 0
+        self.base = base
+    
+    def __len__(self) -> int:
+        return len(self.minima)
+    
+    @property
+    def pico(self) -> float:
+        return float(self.maxima.max()) if len(self) else 0.0
+    
+    @property
+    def minimo(self) -> float:
+        return float(self.minima.min()) if len(self) else 0.0
+    
+    def blackouts_min(self, capacidad_kw: float, desde: int = 0) -> int:
+        """Horas (desde la hora `desde` del horizonte) que fallan pase lo que pase"""
+        return int(np.count_nonzero(self.minima[desde:] > capacidad_kw))
+    
+    def blackouts_max(self, capacidad_kw: float, desde: int = 0) -> int:
+        """Horas que pueden fallar: sin tormenta, más las que solo fallan con tormenta (acotadas)"""
+        sin_tormenta = int(np.count_nonzero(self.maxima_sin_tormenta[desde:] > capacidad_kw))
+        solo_tormenta = int(np.count_nonzero(self.maxima[desde:] > capacidad_kw)) - sin_tormenta
+        return sin_tormenta + min(solo_tormenta, self.horas_tormenta_max)
+    
+    def sufijos_blackouts(self, capacidades, paso: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        blackouts_min y blackouts_max desde cada `paso` horas, para varias capacidades de una vez:
+        (minimos, maximos) de forma (capacidades, ceil(horas / paso) + 1); [j, i] = cota desde
+        la hora i * paso (la última columna, desde el final del horizonte, vale 0).
+        """
+        capacidades = np.atleast_1d(np.asarray(capacidades, dtype=np.float64))[:, None]
+        inicios = np.arange(0, len(self), paso)
+        def sufijo(demanda):
+            if not len(inicios):
+                return np.zeros((len(capacidades), 1), dtype=np.int64)
+            por_paso = np.add.reduceat(demanda > capacidades, inicios, axis=1, dtype=np.int64)
+            sufijos = np.zeros((len(capacidades), len(inicios) + 1), dtype=np.int64)
+            sufijos[:, :-1] = por_paso[:, ::-1].cumsum(axis=1)[:, ::-1]
+            return sufijos
+        minimos = sufijo(self.minima)
+        sin_tormenta = sufijo(self.maxima_sin_tormenta)
+        maximos = sin_tormenta + np.minimum(sufijo(self.maxima) - sin_tormenta, self.horas_tormenta_max)
+        return minimos, maximos
+    
+    def resolver(self, capacidades) -> List[int]:
+        """Blackouts exactos de cada capacidad, o None si dependen de la simulación"""
+        resueltos = []
+        for cap in np.atleast_1d(capacidades).tolist():
+            minimo, maximo = self.blackouts_min(cap), self.blackouts_max(cap)
+            resueltos.append(minimo if minimo == maximo else None)
+        return resueltos
+    
+    def promedio_esperado(self, probabilidad_tormenta: float = 0.0, puntos: int = 16) -> float:
+        """
+        Demanda media esperada (cuadratura sobre la temperatura base uniforme de cada hora).
+        Las tormentas se aproximan por su fracción de horas esperada.
+        """
+        if not len(self):
+            return 0.0
+        # La distribución de temperatura solo depende de (estación, hora del día): tabla 4 × 24
+        # Punto medio sobre u ∈ [0, 1) para la temperatura base y para el ruido ±0.5
+        nodos = (np.arange(puntos) + 0.5) / puntos
+        base_temp = (RANGOS_TEMP_ESTACION[:, :1]
+                     + (RANGOS_TEMP_ESTACION[:, 1:] - RANGOS_TEMP_ESTACION[:, :1]) * nodos)  # (4, puntos)
+        temp = (base_temp[:, None, :, None] + TABLA_VARIACION_TEMP[None, :, None, None]
+                + (nodos - 0.5)[None, None, None, :])                                  # (4, 24, p, p)
+        tabla = factor_temperatura(np.clip(temp, *RANGO_TEMP).ravel()).reshape(temp.shape).mean(axis=(2, 3))
+        
+        tiempo = np.arange(self.tiempo_inicio, HORAS_ANIO)
+        factor = tabla[np.minimum((tiempo // 24) // 90, 3), tiempo % 24]
+        
+        duracion_media = (DURACION_TORMENTA[0] + DURACION_TORMENTA[1]) / 2
+        fraccion = probabilidad_tormenta * duracion_media / (1 + probabilidad_tormenta * duracion_media)
+        fraccion = min(fraccion, MAX_TORMENTAS * duracion_media / len(self))
+        extra_tormenta = 1 + fraccion * (sum(FACTOR_TORMENTA) / 2 - 1)
+        return float((self.base * factor).mean() * extra_tormenta)
+
+def resolver_catalogo(cotas: CotasDemanda, catalogo: Dict[str, Dict], historial_fallos: Dict[str, int],
+                      probabilidad_tormenta: float = 0.0) -> List[Dict]:
+    """
+    Métricas del catálogo sin simular, si las cotas fijan los blackouts de todas las
+    subestaciones (capacidad sobre el pico posible o bajo el mínimo). None si no alcanza.
+    """
+    resueltos = cotas.resolver([datos["capacidad_kw"] for datos in catalogo.values()])
+    if any(b is None for b in resueltos):
+        return None
+    resultados = metricas_catalogo(resueltos, cotas.promedio_esperado(probabilidad_tormenta),
+                                   catalogo, historial_fallos)
+    for r in resultados:
+        r["analitico"] = True  # Promedio de demanda esperado, no simulado
+    return resultados
+
+# ============================================================
+# PODA (Branch and bound sobre la traza en curso)
+# ============================================================
+HORAS_BLOQUE_PODA = 24 * 7  # Cada semana simulada se revisan las cotas
+HORAS_SORTEO_PODA = 24 * 28  # Primer tramo de clima sorteado de una vez (los siguientes se duplican)
+
+def constantes_catalogo(catalogo: Dict[str, Dict], historial_fallos: Dict[str, int]) -> Dict[str, np.ndarray]:
+    """Lo que no cambia entre revisiones de la poda: fallos pasados, costo fijo y horas permitidas"""
+    fallos = np.array([historial_fallos.get(tipo, 0) for tipo in catalogo], dtype=np.int64)
+    return {
+        "fallos": fallos,
+        "costo_fijo": np.array([calcular_metricas_subestacion(tipo, datos, 0, 0.0)["costo_total"]
+                                for tipo, datos in catalogo.items()]),
+        "permitidas": np.array([-1 if h is None else h for h in
+                                (horas_blackout_permitidas(CONFIABILIDAD_MINIMA, f) for f in fallos.tolist())]),
+    }
+
+def cotas_candidatos(blackouts: np.ndarray, horas_restantes, catalogo: Dict[str, Dict],
+                     historial_fallos: Dict[str, int], minimo_restante=0,
+                     constantes: Dict[str, np.ndarray] = None) -> Dict[str, np.ndarray]:
+    """
+    Cotas de cada subestación con los blackouts contados hasta ahora.
+    Los blackouts finales quedan en [b + minimo_restante, b + horas_restantes]
+    (escalares o un valor por subestación, p. ej. de CotasDemanda).
+    `constantes` (de constantes_catalogo) evita recalcularlas en cada revisión.
+    """
+    if constantes is None:
+        constantes = constantes_catalogo(catalogo, historial_fallos)
+    fallos, costo_fijo, permitidas = constantes["fallos"], constantes["costo_fijo"], constantes["permitidas"]
+    blackouts = np.asarray(blackouts, dtype=np.int64)
+    seguro = blackouts + np.asarray(minimo_restante, dtype=np.int64)
+    maximo = blackouts + np.asarray(horas_restantes, dtype=np.int64)
+    return {
+        "inviable": seguro > permitidas,           # Ya no puede llegar al 95%
+        "viable_segura": maximo <= permitidas,     # Llega al 95% aunque falle todo lo que queda
+        "costo_min": costo_fijo + COSTO_HORA_BLACKOUT * (fallos + seguro),
+        "costo_max": costo_fijo + COSTO_HORA_BLACKOUT * (fallos + np.minimum(maximo, np.maximum(permitidas, seguro))),
+        "fallos_min": fallos + seguro,
+        "fallos_max": fallos + maximo,
+    }
+
+def ganadora_asegurada(cotas: Dict[str, np.ndarray]) -> int:
+    """
+    Índice de la subestación que elegir_ganadora elegirá pase lo que pase en las horas
+    restantes (None si todavía no está decidido). Respeta los desempates por orden.
+    """
+    n = len(cotas["inviable"])
+    # Caso normal: una viable segura cuyo peor costo no supera el mejor costo posible del resto
+    for w in np.argsort(cotas["costo_max"], kind="stable").tolist():
+        if not cotas["viable_segura"][w]:
+            continue
+        if all(k == w or cotas["inviable"][k]
+               or cotas["costo_min"][k] > cotas["costo_max"][w]
+               or (cotas["costo_min"][k] == cotas["costo_max"][w] and k > w)
+               for k in range(n)):
+            return w
+    # Todas inviables: gana la de menos fallos totales (mayor confiabilidad)
+    if cotas["inviable"].all():
+        for w in range(n):
+            if all(k == w or cotas["fallos_max"][w] < cotas["fallos_min"][k]
+                   or (cotas["fallos_max"][w] == cotas["fallos_min"][k] and w < k)
+                   for k in range(n)):
+                return w
+    return None
+
+def _bloques_anio(edificios: List[Edificio], tiempo_inicio: int, probabilidad_tormenta: float,
+                  semilla: int, horas_bloque: int):
+    """
+    Resto del año en bloques consecutivos (un solo generador y estado de tormentas).
+    Cada bloque dobla al anterior: pocas llamadas si no se poda, poco desperdicio si se poda pronto.
+    """
+    ciudad = arrays_ciudad(edificios)
+    clima = ClimaContador(semilla)
+    estado = EstadoTormentas()
+    inicio = tiempo_inicio
+    while inicio < HORAS_ANIO:
+        fin = min(inicio + horas_bloque, HORAS_ANIO)
+        yield demanda_desde_sorteos(ciudad, inicio, clima.clima(np.arange(inicio, fin)),
+                                    probabilidad_tormenta, estado)
+        inicio, horas_bloque = fin, horas_bloque * 2
+
+def optimizar_con_poda(bloques, horas_totales: int, catalogo: Dict[str, Dict],
+                       historial_fallos: Dict[str, int],
+                       cotas_demanda: CotasDemanda = None,
+                       probabilidad_tormenta: float = 0.0,
+                       horas_revision: int = HORAS_BLOQUE_PODA) -> Tuple[int, List[Dict]]:
+    """
+    Cuenta blackouts bloque a bloque y corta la simulación en cuanto la ganadora está asegurada
+    (se revisa cada `horas_revision` horas del horizonte, sea cual sea el largo de los bloques).
+    Las horas no simuladas entran como cotas, también para la ganadora: cada subestación lleva
+    "fallos_min"/"fallos_max" y "costo_min"/"costo_max" ("exacto" si coinciden), y sus métricas
+    usan la cota inferior (el promedio de demanda es el de las "horas_evaluadas").
+    Las que pierden sin quedar exactas se marcan con "podada"; la ganadora nunca.
+    Con `cotas_demanda` las horas restantes se acotan hora a hora (y puede no simularse nada:
+    entonces el promedio es el esperado y las filas llevan "analitico").
+    """
+    capacidades = np.array([datos["capacidad_kw"] for datos in catalogo.values()], dtype=np.float64)
+    constantes = constantes_catalogo(catalogo, historial_fallos)
+    if cotas_demanda is not None:
+        # Cotas de lo que falta desde cada punto de revisión: cada revisión es una lectura
+        minimos, maximos = cotas_demanda.sufijos_blackouts(capacidades, horas_revision)
+    blackouts = np.zeros(len(capacidades), dtype=np.int64)
+    suma_demanda = 0.0
+    horas = 0
+    
+    def revisar(contados, horas):
+        """Cotas en uno o varios puntos de revisión (una fila por punto)"""
+        if cotas_demanda is None:
+            return cotas_candidatos(contados, (horas_totales - np.asarray(horas))[..., None], catalogo,
+                                    historial_fallos, constantes=constantes)
+        # Las revisiones caen en múltiplos de horas_revision o al final del horizonte (última columna)
+        desde = np.minimum(-(-np.asarray(horas) // horas_revision), minimos.shape[1] - 1)
+        return cotas_candidatos(contados, maximos[:, desde].T, catalogo, historial_fallos,
+                                minimos[:, desde].T, constantes)
+    
+    cotas = revisar(blackouts, horas)
+    ganadora = ganadora_asegurada(cotas) if cotas_demanda is not None else None
+    if ganadora is None:
+        for bloque in bloques:
+            n = len(bloque)
+            if not n:
+                continue
+            # Puntos de revisión del bloque: múltiplos de horas_revision y el final del horizonte
+            cortes = np.arange(horas_revision - horas % horas_revision, n + 1, horas_revision)
+            if horas + n >= horas_totales and (not len(cortes) or cortes[-1] != n):
+                cortes = np.append(cortes, n)
+            # Conteos acumulados hasta cada punto (el último tramo llega siempre al final del bloque)
+            inicios = np.r_[0, cortes[cortes < n]]
+            contados = blackouts + np.add.reduceat(bloque.demanda[:, None] > capacidades, inicios,
+                                                   axis=0, dtype=np.int64).cumsum(axis=0)
+            demanda = np.add.reduceat(bloque.demanda, inicios).cumsum()
+            fin_bloque = (contados[-1], float(demanda[-1]), n)
+            if len(cortes):
+                revisiones = revisar(contados[:len(cortes)], horas + cortes)
+                # Condición necesaria para ganadora_asegurada: alguna viable segura o todas inviables
+                posibles = revisiones["viable_segura"].any(axis=1) | revisiones["inviable"].all(axis=1)
+                for i in np.flatnonzero(posibles).tolist():
+                    ganadora = ganadora_asegurada({clave: valor[i] for clave, valor in revisiones.items()})
+                    if ganadora is not None:
+                        cotas = {clave: valor[i] for clave, valor in revisiones.items()}
+                        fin_bloque = (contados[i], float(demanda[i]), int(cortes[i]))
+                        break
+            blackouts = fin_bloque[0]
+            suma_demanda += fin_bloque[1]
+            horas += fin_bloque[2]
+            if ganadora is not None:
+                break
+    
+    if ganadora is None:  # Se evaluó todo el año: no queda nada por acotar
+        cotas = cotas_candidatos(blackouts, 0, catalogo, historial_fallos, constantes=constantes)
+    analitico = horas == 0 and horas_totales > 0 and cotas_demanda is not None
+    if analitico:
+        promedio = cotas_demanda.promedio_esperado(probabilidad_tormenta)
+    else:
+        promedio = suma_demanda / horas if horas else 0.0
+    # Blackouts futuros asegurados: los contados más el mínimo de lo que falta
+    seguros = cotas["fallos_min"] - constantes["fallos"]
+    resultados = metricas_catalogo(seguros.tolist(), promedio, catalogo, historial_fallos)
+    if ganadora is None:
+        ganadora = resultados.index(elegir_ganadora(resultados))
+    for j, r in enumerate(resultados):
+        r["horas_evaluadas"] = horas
+        r["fallos_min"] = int(cotas["fallos_min"][j])
+        r["fallos_max"] = int(cotas["fallos_max"][j])
+        r["costo_min"] = r["costo_ajustado"]
+        r["costo_max"] = r["costo_total"] + r["fallos_max"] * COSTO_HORA_BLACKOUT
+        r["exacto"] = r["fallos_min"] == r["fallos_max"]
+        r["podada"] = j != ganadora and not r["exacto"]
+        if analitico:
+            r["analitico"] = True
+    return ganadora, resultados
+
+def encontrar_mejor_subestacion(edificios: List[Edificio], 
+                                dia_actual: int = 0, 
+                                hora_actual: int = 0,
+                                historial_fallos: Dict[str, int] = None,
+                                prob_tormenta: float = 0.0,
+                                motor: str = "vectorizado",
+                                semilla: int = None,
+                                catalogo: Dict[str, Dict] = None,
+                                proyeccion: ProyeccionIncremental = None,
+                                poda: bool = False) -> Tuple[str, List[Dict]]:
+    """
+    Determina la óptima considerando:
+    1. Costo Inversión + Operativo
+    2. Penalización por Blackouts (evita buscar perfección si es muy cara)
+    3. Historial de fallos REALES ya ocurridos
+    Todas las subestaciones se evalúan sobre la MISMA traza de demanda
+    (números aleatorios comunes), ya que la demanda no depende de la capacidad.
+    Con `proyeccion` se usan sus agregados por día en vez de simular el resto del año.
+    Con `poda=True` la traza se genera por semanas y se corta cuando la ganadora ya no puede
+    cambiar: lo no simulado queda como cotas en todas las filas, la ganadora incluida
+    (ver optimizar_con_poda); las perdedoras sin resolver se marcan como "podada".
+    Los sorteos son por hora (ClimaContador), así que la traza por semanas es la misma que en un solo bloque.
+    """
+    if catalogo is None:
+        catalogo = SUBESTACIONES
+    if historial_fallos is None:
+        historial_fallos = {tipo: 0 for tipo in catalogo}
+    
+    print(f"🏆 Iniciando comparación (Día {dia_actual}, Prob Tormenta: {prob_tormenta:.4f})...")
+    
+    if poda:
+        tiempo_inicio = min(dia_actual * 24 + hora_actual, HORAS_ANIO)
+        if proyeccion is not None:
+            bloques = proyeccion.iterar_bloques(dia_actual, hora_actual, prob_tormenta, HORAS_SORTEO_PODA)
+        else:
+            bloques = _bloques_anio(edificios, tiempo_inicio, prob_tormenta, semilla, HORAS_SORTEO_PODA)
+        cotas = CotasDemanda(edificios if proyeccion is None else proyeccion.ciudad,
+                             dia_actual, hora_actual, prob_tormenta)
+        indice, resultados = optimizar_con_poda(bloques, HORAS_ANIO - tiempo_inicio, catalogo,
+                                                historial_fallos, cotas, prob_tormenta)
+        horas = resultados[0]["horas_evaluadas"] if resultados else 0
+        print(f"✂️  Poda: ganadora asegurada tras {horas} de {HORAS_ANIO - tiempo_inicio} horas")
+        for r in resultados:
+            estado = " (podada)" if r["podada"] else ""
+            if r["exacto"]:
+                print(f"{r['tipo']}: ${r['costo_ajustado']:,.0f}{estado}")
+            else:
+                print(f"{r['tipo']}: ${r['costo_min']:,.0f} - ${r['costo_max']:,.0f}{estado}")
+        ganadora = resultados[indice]
+        print(f"\n ÓPTIMA ELEGIDA: {ganadora['tipo']}")
+        return ganadora["tipo"], resultados
+    
+    # Cotas analíticas: si todas las capacidades quedan resueltas no hace falta simular
+    cotas = CotasDemanda(edificios if proyeccion is None else proyeccion.ciudad,
+                         dia_actual, hora_actual, prob_tormenta)
+    resultados = resolver_catalogo(cotas, catalogo, historial_fallos, prob_tormenta)
+    
+    if resultados is not None:
+        print(f"📐 Resuelto sin simular (pico posible {cotas.pico:,.0f} kW, mínimo {cotas.minimo:,.0f} kW)")
+    elif proyeccion is not None:
+        # Reutilizar el año sembrado: solo se recalculan el día parcial y las tormentas
+        capacidades = [datos["capacidad_kw"] for datos in catalogo.values()]
+        blackouts, promedio, _ = proyeccion.agregados(dia_actual, hora_actual, prob_tormenta, capacidades)
+        resultados = metricas_catalogo(blackouts.tolist(), promedio, catalogo, historial_fallos)
     else:
-        # Si todas son desastrosas, elegir la menos mala (mayor confiabilidad)
-        ganadora = max(resultados, key=lambda x: x["confiabilidad_real"])
+        # Simular futuro (una sola vez para todas)
+        traza = simular_traza(edificios, dia_actual, hora_actual, prob_tormenta, motor, semilla)
+        resultados = evaluar_catalogo(traza, catalogo, historial_fallos)
+    
+    for r in resultados:
+        print(f"{r['tipo']}: ${r['costo_total']:,.0f} + ${r['costo_multas']:,.0f} (Multas) = ${r['costo_ajustado']:,.0f}")
+
+    ganadora = elegir_ganadora(resultados)
     
     print(f"\n ÓPTIMA ELEGIDA: {ganadora['tipo']}")
     
     return ganadora["tipo"], resultados
 
+def dimensionar_subestacion(edificios: List[Edificio], dia_actual: int = 0, hora_actual: int = 0,
+                            prob_tormenta: float = 0.0,
+                            confiabilidad_objetivo: float = CONFIABILIDAD_MINIMA,
+                            fallos_pasados: int = 0,
+                            motor: str = "vectorizado", semilla: int = None) -> float:
+    """Capacidad mínima (kW) que cumple la confiabilidad objetivo, leída de la curva de duración"""
+    traza = simular_traza(edificios, dia_actual, hora_actual, prob_tormenta, motor, semilla)
+    return traza.curva_duracion().capacidad_para_confiabilidad(confiabilidad_objetivo, fallos_pasados)
+
 # ============================================================
 # FUNCIONES AUXILIARES PARA LA INTERFAZ
 # ============================================================
 def obtener_datos_snapshot(edificios: List[Edificio], hora: int, temperatura: float) -> Dict:
     """Devuelve datos en tiempo real para mostrar en UI"""
-    consumo_residencial = 0
-    consumo_comercial = 0
-    consumo_industrial = 0
-    
-    for ed in edificios:
-        consumo = ed.calcular_consumo(hora, temperatura)
-        if ed.tipo == "residencial":
-            consumo_residencial += consumo
-        elif ed.tipo == "comercial":
-            consumo_comercial += consumo
-        else:
-            consumo_industrial += consumo
+    ciudad = arrays_ciudad(edificios)
+    consumos = calcular_consumo_vectorizado(ciudad, hora, temperatura)
+    brillos = calcular_brillo_vectorizado(ciudad, hora)
+    
+    # Reflejar el estado en cada edificio (la UI lo usa para dibujar y en el hover)
+    if not isinstance(edificios, CiudadArrays):
+        for ed, consumo, brillo in zip(edificios, consumos.tolist(), brillos.tolist()):
+            ed.consumo_actual = consumo
+            ed.brillo = brillo
+    
+    consumo_residencial, consumo_comercial, consumo_industrial = \
+        demanda_por_tipo(ciudad, hora, temperatura).tolist()
     
     consumo_total = consumo_residencial + consumo_comercial + consumo_industrial
-    poblacion_total = sum(ed.poblacion for ed in edificios)
+    poblacion_total = int(ciudad.poblacion.sum())
     
     return {
         "hora": hora,
@@ -498,7 +1572,6 @@ if __name__ == "__main__":
     print("Testeando motor lógico...")
     
     # Crear ciudad de prueba
-    pygame.init()
     eds = generar_ciudad()
     
     print(f"Generados {len(eds)} edificios")
@@ -511,4 +1584,85 @@ if __name__ == "__main__":
         print(f"Hora {h:02d}:00 - Consumo: {datos['consumo_total_kw']:,.0f} kW")
     
     print("\n" + "="*50)
-    mejor, todos = encontrar_mejor_subestacion(eds)
\ No newline at end of file
+    mejor, todos = encontrar_mejor_subestacion(eds)
+    
+    # Benchmark de motores: python motor_logico.py --benchmark
+    if "--benchmark" in sys.argv:
+        print("\n" + "="*50)
+        print("BENCHMARK DE MOTORES (traza + evaluación del catálogo, mejor de 5)")
+        # Ciudad donde las cotas analíticas no alcanzan: el optimizador sí tiene que simular
+        eds_bench = generar_ciudad(2000, semilla=0)
+        tiempos = {}
+        for motor in MOTORES_SIMULACION:
+            mejores = []
+            for rep in range(5):
+                t0 = time.perf_counter()
+                evaluar_catalogo(simular_traza(eds_bench, 0, 0, 0.01, motor, rep))
+                mejores.append(time.perf_counter() - t0)
+            tiempos[motor] = min(mejores)
+        for motor, t in tiempos.items():
+            print(f"{motor:12s}: {t * 1000:8.1f} ms  ({tiempos['bucle'] / t:6.1f}x vs bucle)")
+        
+        # Arranque en frío: el motor no debe importar pygame
+        import subprocess
+        print("\nBENCHMARK DE ARRANQUE (intérprete nuevo, mejor de 5)")
+        comandos = {
+            "import motor_logico": "import motor_logico, sys; assert 'pygame' not in sys.modules",
+            "import pygame": "import pygame",
+        }
+        for nombre, codigo in comandos.items():
+            mejores = []
+            for _ in range(5):
+                t0 = time.perf_counter()
+                subprocess.run([sys.executable, "-c", codigo], check=True, capture_output=True)
+                mejores.append(time.perf_counter() - t0)
+            print(f"{nombre:20s}: {min(mejores) * 1000:8.1f} ms")
+        
+        # Re-proyección incremental, poda y cotas frente a simular de nuevo (mismo escenario)
+        proyeccion = ProyeccionIncremental(eds_bench, semilla=0)
+        casos = {
+            "simular de nuevo": lambda: encontrar_mejor_subestacion(eds_bench, 100, 6, prob_tormenta=0.01, semilla=0),
+            "incremental": lambda: encontrar_mejor_subestacion(eds_bench, 100, 6, prob_tormenta=0.01,
+                                                               proyeccion=proyeccion),
+            "poda + cotas": lambda: encontrar_mejor_subestacion(eds_bench, 100, 6, prob_tormenta=0.01,
+                                                                semilla=0, poda=True),
+            "solo cotas (50 ed.)": lambda: encontrar_mejor_subestacion(eds, 100, 6, prob_tormenta=0.01),
+        }
+        print("\nRE-PROYECCIÓN (día 100, mejor de 5)")
+        for nombre, caso in casos.items():
+            mejores = []
+            for _ in range(5):
+                t0 = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    caso()
+                mejores.append(time.perf_counter() - t0)
+            print(f"{nombre:20s}: {min(mejores) * 1000:8.2f} ms")
+        
+        # Sorteos por contador: el último mes sale igual sin generar los once anteriores
+        ciudad_bench = arrays_ciudad(eds_bench)
+        completa = simular_traza_vectorizada(eds_bench, 0, 0, 0.05, semilla=0)
+        desde = HORAS_ANIO - 30 * 24
+        t0 = time.perf_counter()
+        tramo = generar_tramo_demanda(ciudad_bench, 0, desde, HORAS_ANIO, 0.05, semilla=0)
+        t_tramo = time.perf_counter() - t0
+        assert np.array_equal(tramo.demanda, completa.demanda[desde:])
+        print(f"\nACCESO ALEATORIO: último mes en {t_tramo * 1000:.2f} ms (idéntico a la traza completa)")
+        
+        # Memoria por edificio (objetos Python, sin el modelo vectorial)
+        import tracemalloc
+        n = 100_000
+        tracemalloc.start()
+        muestra = [Edificio(TIPOS_EDIFICIO[i % 3], i) for i in range(n)]
+        memoria, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"\nMEMORIA: {memoria / n:.0f} bytes por edificio ({n:,} edificios, {memoria / 2**20:.1f} MiB)")
+        
+        # Generación vectorizada de ciudades grandes
+        print("\nGENERACIÓN DE CIUDAD (como_arrays=True, mejor de 3)")
+        for n in (10**6, 10**7):
+            mejores = []
+            for rep in range(3):
+                t0 = time.perf_counter()
+                generar_ciudad(n, semilla=rep, como_arrays=True)
+                mejores.append(time.perf_counter() - t0)
+            print(f"{n:>12,} edificios: {min(mejores) * 1000:8.1f} ms")
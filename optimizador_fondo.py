@@ -0,0 +1,211 @@
+import math
+import queue
+import threading
+from collections import namedtuple
+from typing import List, Dict, Tuple, Iterable, Callable
+from motor_logico import (SUBESTACIONES, HORAS_ANIO, Edificio, TrazaDemanda, ProyeccionIncremental,
+                          CotasDemanda, metricas_catalogo, elegir_ganadora, resolver_catalogo)
+
+# ============================================================
+# OPTIMIZADOR EN SEGUNDO PLANO
+# ============================================================
+HORAS_MES = 24 * 30  # Tamaño de bloque: un evento de progreso por mes proyectado
+
+EventoOptimizacion = namedtuple("EventoOptimizacion", ["tipo", "datos"])
+# tipo: "progreso" (meses hechos, meses totales) | "parcial" (ganadora, resultados estimados)
+#       "resultado" (ganadora, resultados) | "cancelado" (None) | "error" (excepción)
+
+class OptimizacionCancelada(Exception):
+    """Se lanza dentro del worker cuando el usuario cancela"""
+    pass
+
+def meses_restantes(dia_inicio: int, hora_inicio: int, horas_bloque: int = HORAS_MES) -> int:
+    """Cantidad de bloques mensuales hasta fin de año"""
+    return math.ceil(max(0, HORAS_ANIO - (dia_inicio * 24 + hora_inicio)) / horas_bloque)
+
+def estimar_resultados(agregador: "AgregadorBlackouts", horas_totales: int,
+                       catalogo: Dict[str, Dict], historial_fallos: Dict[str, int]) -> Tuple[str, List[Dict]]:
+    """
+    Ganadora y métricas con lo simulado hasta ahora: los blackouts se extrapolan
+    linealmente a las horas que faltan. Con todas las horas simuladas es el resultado exacto.
+    """
+    horas = agregador.horas
+    promedio = agregador.suma_demanda / horas if horas else 0.0
+    escala = horas_totales / horas if horas and horas < horas_totales else 1.0
+    blackouts = [int(round(b * escala)) for b in agregador.blackouts.tolist()]
+    resultados = metricas_catalogo(blackouts, promedio, catalogo, historial_fallos)
+    for r in resultados:
+        r["progreso"] = min(1.0, horas / horas_totales) if horas_totales else 1.0
+        r["estimado"] = escala != 1.0
+    return elegir_ganadora(resultados)["tipo"], resultados
+
+def optimizar_por_bloques(bloques: Iterable[TrazaDemanda],
+                          catalogo: Dict[str, Dict] = None,
+                          historial_fallos: Dict[str, int] = None,
+                          al_terminar_bloque: Callable[[int, Tuple[str, List[Dict]]], None] = None,
+                          horas_totales: int = None) -> Tuple[str, List[Dict]]:
+    """
+    Mismo criterio que encontrar_mejor_subestacion, acumulando blackouts bloque a bloque.
+    `al_terminar_bloque(n, estimacion)` se llama tras cada bloque con la estimación parcial
+    (extrapolada a `horas_totales`); puede lanzar OptimizacionCancelada.
+    """
+    from flujo import AgregadorBlackouts
+
+    if catalogo is None:
+        catalogo = SUBESTACIONES
+    if historial_fallos is None:
+        historial_fallos = {tipo: 0 for tipo in catalogo}
+
+    agregador = AgregadorBlackouts(catalogo)
+    for n, bloque in enumerate(bloques, start=1):
+        agregador.consumir(bloque)
+        if al_terminar_bloque is not None:
+            estimacion = estimar_resultados(agregador, horas_totales or agregador.horas,
+                                            catalogo, historial_fallos)
+            al_terminar_bloque(n, estimacion)
+
+    return estimar_resultados(agregador, agregador.horas, catalogo, historial_fallos)
+
+class OptimizadorFondo:
+    """
+    Corre el optimizador en un hilo y publica eventos en una cola.
+    La UI llama a `eventos()` en cada frame, así que nunca se bloquea; `cancelar()` lo detiene
+    al terminar el mes en curso.
+    Con `incremental=True` y sin `proyeccion`, el año sembrado (ProyeccionIncremental con
+    `semilla`) se construye en el hilo y queda en `self.proyeccion` para reutilizarlo.
+    """
+    def __init__(self, edificios: List[Edificio],
+                 dia_actual: int = 0,
+                 hora_actual: int = 0,
+                 historial_fallos: Dict[str, int] = None,
+                 prob_tormenta: float = 0.0,
+                 semilla: int = None,
+                 catalogo: Dict[str, Dict] = None,
+                 proyeccion: ProyeccionIncremental = None,
+                 horas_bloque: int = HORAS_MES,
+                 incremental: bool = False):
+        self.edificios = edificios
+        self.dia_actual = dia_actual
+        self.hora_actual = hora_actual
+        # Copia: la UI sigue sumando fallos mientras el hilo trabaja
+        self.historial_fallos = dict(historial_fallos) if historial_fallos is not None else None
+        self.prob_tormenta = prob_tormenta
+        self.semilla = semilla
+        self.catalogo = SUBESTACIONES if catalogo is None else catalogo
+        self.proyeccion = proyeccion
+        self.incremental = incremental
+        self.horas_bloque = horas_bloque
+
+        self.horas_totales = max(0, HORAS_ANIO - (dia_actual * 24 + hora_actual))
+        self.meses_totales = meses_restantes(dia_actual, hora_actual, horas_bloque)
+        self.meses_hechos = 0
+        self.parcial = None     # Última estimación (ganadora, resultados) antes de terminar
+        self.resultado = None
+        self._cola = queue.Queue()
+        self._cancelar = threading.Event()
+        self._hilo = threading.Thread(target=self._trabajar, daemon=True)
+
+    @property
+    def progreso(self) -> float:
+        """Fracción completada (0-1)"""
+        return self.meses_hechos / self.meses_totales if self.meses_totales else 1.0
+
+    @property
+    def activo(self) -> bool:
+        return self._hilo.is_alive()
+
+    def iniciar(self) -> "OptimizadorFondo":
+        self._hilo.start()
+        return self
+
+    def cancelar(self):
+        self._cancelar.set()
+
+    def esperar(self, timeout: float = None):
+        self._hilo.join(timeout)
+
+    def eventos(self) -> List[EventoOptimizacion]:
+        """Eventos pendientes (sin bloquear); actualiza progreso y resultado"""
+        pendientes = []
+        while True:
+            try:
+                evento = self._cola.get_nowait()
+            except queue.Empty:
+                return pendientes
+            if evento.tipo == "progreso":
+                self.meses_hechos = evento.datos[0]
+            elif evento.tipo == "parcial":
+                self.parcial = evento.datos
+            elif evento.tipo == "resultado":
+                self.meses_hechos = self.meses_totales
+                self.resultado = evento.datos
+            pendientes.append(evento)
+
+    def _bloques(self) -> Iterable[TrazaDemanda]:
+        if self.proyeccion is not None:
+            return self.proyeccion.iterar_bloques(self.dia_actual, self.hora_actual,
+                                                  self.prob_tormenta, self.horas_bloque)
+        from flujo import iterar_bloques_demanda
+        return iterar_bloques_demanda(self.edificios, self.dia_actual, self.hora_actual,
+                                      self.prob_tormenta, self.semilla, self.horas_bloque)
+
+    def _al_terminar_bloque(self, n: int, estimacion: Tuple[str, List[Dict]]):
+        self._cola.put(EventoOptimizacion("progreso", (n, self.meses_totales)))
+        if n < self.meses_totales:
+            self._cola.put(EventoOptimizacion("parcial", estimacion))
+        if self._cancelar.is_set():
+            raise OptimizacionCancelada()
+
+    def _trabajar(self):
+        try:
+            if self._cancelar.is_set():
+                raise OptimizacionCancelada()
+            if self.proyeccion is None and self.incremental:
+                self.proyeccion = ProyeccionIncremental(self.edificios, self.semilla)
+            # Si las cotas analíticas fijan todos los blackouts, no se simula ningún mes
+            ciudad = self.edificios if self.proyeccion is None else self.proyeccion.ciudad
+            cotas = CotasDemanda(ciudad, self.dia_actual, self.hora_actual, self.prob_tormenta)
+            historial = self.historial_fallos
+            if historial is None:
+                historial = {tipo: 0 for tipo in self.catalogo}
+            resultados = resolver_catalogo(cotas, self.catalogo, historial, self.prob_tormenta)
+            if resultados is not None:
+                self._cola.put(EventoOptimizacion("resultado", (elegir_ganadora(resultados)["tipo"], resultados)))
+                return
+            resultado = optimizar_por_bloques(self._bloques(), self.catalogo, self.historial_fallos,
+                                              self._al_terminar_bloque, self.horas_totales)
+            self._cola.put(EventoOptimizacion("resultado", resultado))
+        except OptimizacionCancelada:
+            self._cola.put(EventoOptimizacion("cancelado", None))
+        except Exception as e:
+            self._cola.put(EventoOptimizacion("error", e))
+
+# ============================================================
+# TEST RÁPIDO
+# ============================================================
+if __name__ == "__main__":
+    import time
+    from motor_logico import generar_ciudad, encontrar_mejor_subestacion
+
+    eds = generar_ciudad(200, semilla=3)
+    proyeccion = ProyeccionIncremental(eds, semilla=3)
+
+    tarea = OptimizadorFondo(eds, 20, 6, prob_tormenta=0.01, proyeccion=proyeccion).iniciar()
+    while tarea.resultado is None:
+        for evento in tarea.eventos():
+            if evento.tipo == "progreso":
+                hechos, totales = evento.datos
+                print(f"Mes {hechos}/{totales} ({hechos / totales:.0%})", end="")
+            elif evento.tipo == "parcial":
+                ganadora, resultados = evento.datos
+                estimados = ", ".join(f"{r['tipo']}: {r['blackouts_futuros']}h" for r in resultados)
+                print(f" -> preliminar {ganadora} ({estimados})")
+        time.sleep(0.001)
+    print(f"\nEn segundo plano: {tarea.resultado[0]}")
+    print(f"Directo:          {encontrar_mejor_subestacion(eds, 20, 6, prob_tormenta=0.01, proyeccion=proyeccion)[0]}")
+
+    # Cancelación antes de terminar
+    tarea = OptimizadorFondo(eds, 0, 0, prob_tormenta=0.01, semilla=1)
+    tarea.cancelar()
+    tarea.iniciar().esperar()
+    print(f"Cancelada: {[e.tipo for e in tarea.eventos()]}")
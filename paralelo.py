@@ -0,0 +1,150 @@
+import os
+import time
+import atexit
+import multiprocessing
+import numpy as np
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import List, Dict, Tuple
+from motor_logico import (SUBESTACIONES, HORAS_ANIO, Edificio, TrazaDemanda, ResultadoAnual, ClimaContador,
+                          arrays_ciudad, traza_con_tormentas)
+
+# ============================================================
+# PROYECCIÓN ANUAL POR TRAMOS EN VARIOS PROCESOS
+# ============================================================
+HORAS_TRAMO = 24 * 30  # Un mes por tarea
+
+# Pool del proceso (max_workers, pool): arrancarlo cuesta más que un año de trabajo, así que se reutiliza
+_POOL = None
+
+def semilla_concreta(semilla: int = None) -> int:
+    """Todos los tramos deben compartir la semilla: sin semilla se sortea una"""
+    if semilla is not None:
+        return semilla
+    return int(np.random.SeedSequence().generate_state(1)[0])
+
+def tramos_horizonte(tiempo_inicio: int, tiempo_fin: int, horas_tramo: int = HORAS_TRAMO) -> List[Tuple[int, int]]:
+    """Cortes [desde, hasta) del horizonte, en orden"""
+    return [(desde, min(desde + horas_tramo, tiempo_fin))
+            for desde in range(tiempo_inicio, tiempo_fin, horas_tramo)]
+
+def _traza_tramo(demanda_base_hora: np.ndarray, semilla: int, desde: int,
+                 en_tormenta: np.ndarray, multiplicador: np.ndarray) -> TrazaDemanda:
+    """
+    Worker: temperatura por contador de las horas del tramo + su parte del calendario y
+    multiplicador de tormentas (el flujo de tormentas ya lo generó el padre, no se repite)
+    """
+    temperatura = ClimaContador(semilla).temperatura(np.arange(desde, desde + len(en_tormenta)))
+    return traza_con_tormentas(demanda_base_hora, desde, temperatura, multiplicador, en_tormenta)
+
+def _resultado_tramo(tipo: str, datos: Dict, dtype, demanda_base_hora: np.ndarray, semilla: int,
+                     desde: int, en_tormenta: np.ndarray, multiplicador: np.ndarray) -> ResultadoAnual:
+    """Worker: agregados parciales (blackouts, historiales) de un tramo"""
+    resultado = ResultadoAnual(tipo, datos, dtype=dtype)
+    resultado.registrar_traza(_traza_tramo(demanda_base_hora, semilla, desde, en_tormenta, multiplicador))
+    return resultado
+
+def _tareas(edificios: List[Edificio], dia_inicio: int, hora_inicio: int, probabilidad_tormenta: float,
+            semilla: int, horas_tramo: int) -> List[Tuple]:
+    """
+    Argumentos de cada tramo. El calendario de tormentas se resuelve antes, en serie:
+    así una tormenta que cruza un corte cae igual que en la proyección de un solo bloque.
+    El padre genera el flujo de tormentas una sola vez (calendario y multiplicador); los
+    workers solo sortean la temperatura. Reciben la demanda base por hora (24 valores),
+    no las columnas de la ciudad.
+    """
+    ciudad = arrays_ciudad(edificios)
+    tiempo_inicio = dia_inicio * 24 + hora_inicio
+    en_tormenta, multiplicador = ClimaContador(semilla).tormentas(tiempo_inicio, HORAS_ANIO, probabilidad_tormenta)
+    return [(ciudad.demanda_base_hora, semilla, desde, en_tormenta[desde - tiempo_inicio:hasta - tiempo_inicio],
+             multiplicador[desde - tiempo_inicio:hasta - tiempo_inicio])
+            for desde, hasta in tramos_horizonte(tiempo_inicio, HORAS_ANIO, horas_tramo)]
+
+def en_worker() -> bool:
+    """True dentro de un proceso hijo (p. ej. un worker de lote, ensamble o barrido)"""
+    return multiprocessing.parent_process() is not None
+
+def pool_compartido(max_workers: int) -> ProcessPoolExecutor:
+    """Pool de procesos creado la primera vez y reutilizado en las llamadas siguientes"""
+    global _POOL
+    if _POOL is None or _POOL[0] != max_workers:
+        cerrar_pool()
+        _POOL = (max_workers, ProcessPoolExecutor(max_workers=max_workers))
+    return _POOL[1]
+
+def cerrar_pool():
+    global _POOL
+    if _POOL is not None:
+        _POOL[1].shutdown()
+        _POOL = None
+
+atexit.register(cerrar_pool)
+
+def _mapear(funcion, tareas: List[Tuple], max_workers: int, executor: Executor = None) -> List:
+    """
+    Resultados de cada tarea en el orden de entrada. Con `executor` se usa ese pool; si no,
+    el pool compartido. En serie con un solo worker o si ya se corre dentro de un worker
+    (no se anidan pools: serían hasta cpu_count² procesos).
+    """
+    if executor is None:
+        if max_workers <= 1 or len(tareas) <= 1 or en_worker():
+            return [funcion(*tarea) for tarea in tareas]
+        executor = pool_compartido(max_workers)
+    return list(executor.map(funcion, *zip(*tareas)))
+
+def simular_traza_paralela(edificios: List[Edificio], dia_inicio: int = 0, hora_inicio: int = 0,
+                           probabilidad_tormenta: float = 0.0, semilla: int = None,
+                           horas_tramo: int = HORAS_TRAMO, max_workers: int = None,
+                           executor: Executor = None) -> TrazaDemanda:
+    """Misma traza que el motor vectorizado con la misma semilla, generada por tramos en paralelo"""
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    semilla = semilla_concreta(semilla)
+    tareas = _tareas(edificios, dia_inicio, hora_inicio, probabilidad_tormenta, semilla, horas_tramo)
+    trazas = _mapear(_traza_tramo, tareas, max_workers, executor)
+    tiempo_inicio = dia_inicio * 24 + hora_inicio
+    if not trazas:
+        return TrazaDemanda(tiempo_inicio, np.empty(0), np.empty(0))
+    return TrazaDemanda(tiempo_inicio, np.concatenate([t.demanda for t in trazas]),
+                        np.concatenate([t.temperatura for t in trazas]))
+
+def simular_anio_paralelo(tipo_subestacion: str, edificios: List[Edificio],
+                          dia_inicio: int = 0, hora_inicio: int = 0,
+                          probabilidad_tormenta: float = 0.0, semilla: int = None,
+                          dtype=np.float64, horas_tramo: int = HORAS_TRAMO,
+                          max_workers: int = None, datos: Dict = None,
+                          executor: Executor = None) -> ResultadoAnual:
+    """
+    simular_anio repartido por tramos: cada proceso devuelve un ResultadoAnual parcial
+    y se unen en orden (blackouts sumados, historiales concatenados).
+    """
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    if datos is None:
+        datos = SUBESTACIONES[tipo_subestacion]
+    semilla = semilla_concreta(semilla)
+    tareas = [(tipo_subestacion, datos, dtype) + tarea
+              for tarea in _tareas(edificios, dia_inicio, hora_inicio, probabilidad_tormenta, semilla, horas_tramo)]
+    partes = _mapear(_resultado_tramo, tareas, max_workers, executor)
+    if not partes:
+        return ResultadoAnual(tipo_subestacion, datos, dtype=dtype)
+    return ResultadoAnual.unir(partes)
+
+# ============================================================
+# TEST RÁPIDO
+# ============================================================
+if __name__ == "__main__":
+    from motor_logico import generar_ciudad, simular_anio
+
+    eds = generar_ciudad(10**6, semilla=0, como_arrays=True)
+    serie = simular_anio("Pequeña", eds, 40, 5, probabilidad_tormenta=0.05, semilla=3)
+    workers = max(2, os.cpu_count() or 1)
+    # La primera llamada arranca el pool compartido; las siguientes lo reutilizan
+    for corrida, n in (("en serie", 1), ("arranque del pool", workers), ("pool reutilizado", workers)):
+        t0 = time.perf_counter()
+        partes = simular_anio_paralelo("Pequeña", eds, 40, 5, 0.05, semilla=3, max_workers=n)
+        t = time.perf_counter() - t0
+        iguales = (np.array_equal(partes.historial_horas, serie.historial_horas)
+                   and np.array_equal(partes.historial_demanda, serie.historial_demanda)
+                   and partes.blackouts == serie.blackouts)
+        print(f"{corrida:18s} ({n} proceso(s)): {t * 1000:.1f} ms | {partes.blackouts} blackouts | "
+              f"idéntico a la proyección en serie: {iguales}")
@@ -0,0 +1,93 @@
+import pygame
+from typing import List
+from config import GRID_RECT, GRID_MARGIN_X, GRID_MARGIN_Y
+from motor_logico import Edificio, dimensiones_grid
+
+# ============================================================
+# GEOMETRÍA DE LOS EDIFICIOS EN PANTALLA
+# ============================================================
+def calcular_rects(edificios: List[Edificio]) -> List[pygame.Rect]:
+    """Rect de cada edificio dentro del GRID_RECT según su celda (mismo orden que la lista)"""
+    filas = getattr(edificios, "filas", 0)
+    cols = getattr(edificios, "columnas", 0)
+    if not filas or not cols:
+        filas, cols = dimensiones_grid(len(edificios))
+
+    # Área disponible para el grid
+    start_x = GRID_RECT[0] + GRID_MARGIN_X
+    start_y = GRID_RECT[1] + GRID_MARGIN_Y
+    available_w = GRID_RECT[2] - (2 * GRID_MARGIN_X)
+    available_h = GRID_RECT[3] - (2 * GRID_MARGIN_Y)
+
+    # Tamaño de celda
+    cell_w = available_w // cols
+    cell_h = available_h // filas
+
+    # Margen entre edificios
+    gap = max(5, int(min(cell_w, cell_h) * 0.15)) # Gap dinámico
+    edificio_w = cell_w - gap
+    edificio_h = cell_h - gap
+
+    rects = []
+    for ed in edificios:
+        fil, col = divmod(ed.indice, cols)
+        x = start_x + (col * cell_w) + (gap // 2)
+        y = start_y + (fil * cell_h) + (gap // 2)
+        rects.append(pygame.Rect(x, y, edificio_w, edificio_h))
+    return rects
+
+# ============================================================
+# DIBUJO
+# ============================================================
+def dibujar_edificio(screen, edificio: Edificio, rect: pygame.Rect):
+    """Dibujar el edificio según su tipo"""
+    color = (
+        min(255, int(edificio.color_base[0] * edificio.brillo)),
+        min(255, int(edificio.color_base[1] * edificio.brillo)),
+        min(255, int(edificio.color_base[2] * edificio.brillo))
+    )
+
+    # Dibujar base del edificio
+    pygame.draw.rect(screen, color, rect, border_radius=5)
+
+    # Dibujar detalles según tipo
+    if edificio.forma == "casa":
+        # Techo triangular
+        puntos = [
+            (rect.centerx, rect.top - 5),
+            (rect.left, rect.top + 15),
+            (rect.right, rect.top + 15)
+        ]
+        pygame.draw.polygon(screen, color, puntos)
+        # Ventanas
+        for i in range(2):
+            ventana_rect = pygame.Rect(
+                rect.left + 5 + i * 15,
+                rect.top + 20,
+                8, 10
+            )
+            pygame.draw.rect(screen, (255, 255, 200), ventana_rect)
+
+    elif edificio.forma == "oficina":
+        # Ventanas rectangulares
+        for i in range(3):
+            for j in range(2):
+                ventana_rect = pygame.Rect(
+                    rect.left + 10 + i * 18,
+                    rect.top + 15 + j * 20,
+                    12, 15
+                )
+                pygame.draw.rect(screen, (255, 255, 200), ventana_rect)
+
+    else:  # fabrica
+        # Chimenea
+        chimenea_rect = pygame.Rect(
+            rect.right - 15,
+            rect.top - 20,
+            8, 20
+        )
+        pygame.draw.rect(screen, (100, 100, 100), chimenea_rect)
+        # Humo
+        for i in range(3):
+            pygame.draw.circle(screen, (200, 200, 200),
+                             (rect.right - 11, rect.top - 25 - i * 5), 4)